@@ -0,0 +1,34 @@
+"""trigram search indexes
+
+Revision ID: 19c77255368f
+Revises: 187214172ada
+Create Date: 2026-10-18 13:31:10.274981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '19c77255368f'
+down_revision: Union[str, None] = '187214172ada'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_organizations_name_trgm', 'organizations', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_buildings_address_trgm', 'buildings', ['address'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'address': 'gin_trgm_ops'})
+    op.create_index('ix_activities_name_trgm', 'activities', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_activities_name_trgm', table_name='activities')
+    op.drop_index('ix_buildings_address_trgm', table_name='buildings')
+    op.drop_index('ix_organizations_name_trgm', table_name='organizations')
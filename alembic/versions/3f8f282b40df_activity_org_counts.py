@@ -0,0 +1,43 @@
+"""activity org counts
+
+Revision ID: 3f8f282b40df
+Revises: d3d1b641c48d
+Create Date: 2026-10-18 15:12:38.271554
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8f282b40df'
+down_revision: Union[str, None] = 'd3d1b641c48d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('activity_org_counts',
+    sa.Column('activity_id', sa.Integer(), nullable=False),
+    sa.Column('organization_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['activity_id'], ['activities.id'], ),
+    sa.PrimaryKeyConstraint('activity_id')
+    )
+    # Считаем по уже существующим связям
+    op.execute("""
+        INSERT INTO activity_org_counts (activity_id, organization_count)
+        SELECT activity_closure.ancestor_id,
+               count(DISTINCT organization_activity.organization_id)
+        FROM organization_activity
+        JOIN activity_closure
+            ON activity_closure.descendant_id = organization_activity.activity_id
+        GROUP BY activity_closure.ancestor_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('activity_org_counts')
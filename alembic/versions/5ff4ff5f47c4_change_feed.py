@@ -0,0 +1,64 @@
+"""change feed
+
+Revision ID: 5ff4ff5f47c4
+Revises: 3f8f282b40df
+Create Date: 2026-10-18 17:06:41.183902
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5ff4ff5f47c4'
+down_revision: Union[str, None] = '3f8f282b40df'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKED_TABLES = ('organizations', 'buildings', 'activities')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('change_sequence',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Уже существующие строки получают change_seq = 1
+    op.execute("INSERT INTO change_sequence (id, value) VALUES (1, 1)")
+    op.create_table('tombstones',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+              nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstones_change_seq', 'tombstones', ['change_seq', 'id'],
+                    unique=False)
+
+    for table in TRACKED_TABLES:
+        op.add_column(table, sa.Column('created_at', sa.DateTime(timezone=True),
+                                       server_default=sa.text('now()'), nullable=False))
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True),
+                                       server_default=sa.text('now()'), nullable=False))
+        op.add_column(table, sa.Column('change_seq', sa.BigInteger(), nullable=True))
+        op.execute(f"UPDATE {table} SET change_seq = 1")
+        op.alter_column(table, 'change_seq', nullable=False)
+        op.create_index(f'ix_{table}_change_seq', table, ['change_seq', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(TRACKED_TABLES):
+        op.drop_index(f'ix_{table}_change_seq', table_name=table)
+        op.drop_column(table, 'change_seq')
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'created_at')
+    op.drop_index('ix_tombstones_change_seq', table_name='tombstones')
+    op.drop_table('tombstones')
+    op.drop_table('change_sequence')
@@ -0,0 +1,27 @@
+"""buildings geo index
+
+Revision ID: 6a6e59b1194b
+Revises: 71695cb0bdf6
+Create Date: 2026-10-18 10:12:04.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '6a6e59b1194b'
+down_revision: Union[str, None] = '71695cb0bdf6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_buildings_latitude_longitude', 'buildings',
+                    ['latitude', 'longitude'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_buildings_latitude_longitude', table_name='buildings')
@@ -0,0 +1,58 @@
+"""organization phones e164
+
+Revision ID: c9a131faf9c7
+Revises: 19c77255368f
+Create Date: 2026-10-18 14:02:47.518306
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9a131faf9c7'
+down_revision: Union[str, None] = '19c77255368f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('organizations', sa.Column(
+        'phones_e164', postgresql.ARRAY(sa.String()), server_default=sa.text("'{}'"),
+        nullable=False))
+    # Same rules as db.phones.normalize_phones
+    op.execute(r"""
+        UPDATE organizations SET phones_e164 = ARRAY(
+            SELECT phone FROM (
+                SELECT min(n) AS n, phone FROM (
+                    SELECT n, CASE
+                        WHEN btrim(part) LIKE '+%' THEN '+' || digits
+                        WHEN length(digits) = 11 AND left(digits, 1) = '8'
+                            THEN '+7' || substr(digits, 2)
+                        WHEN length(digits) = 10 THEN '+7' || digits
+                        ELSE '+' || digits
+                    END AS phone
+                    FROM (
+                        SELECT n, part, regexp_replace(part, '\D', '', 'g') AS digits
+                        FROM unnest(regexp_split_to_array(phones, '[,;]'))
+                            WITH ORDINALITY AS p(part, n)
+                    ) AS parts
+                    WHERE digits <> ''
+                ) AS normalized
+                GROUP BY phone
+            ) AS deduplicated
+            ORDER BY n
+        )
+    """)
+    op.create_index('ix_organizations_phones_e164', 'organizations', ['phones_e164'],
+                    unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_organizations_phones_e164', table_name='organizations')
+    op.drop_column('organizations', 'phones_e164')
@@ -0,0 +1,35 @@
+"""foreign key and lookup indexes
+
+Revision ID: d3d1b641c48d
+Revises: c9a131faf9c7
+Create Date: 2026-10-18 14:25:13.804125
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3d1b641c48d'
+down_revision: Union[str, None] = 'c9a131faf9c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_organizations_building_id'), 'organizations', ['building_id'],
+                    unique=False)
+    op.create_index(op.f('ix_activities_parent_id'), 'activities', ['parent_id'], unique=False)
+    op.create_index(op.f('ix_activities_name'), 'activities', ['name'], unique=False)
+    op.create_index(op.f('ix_organization_activity_activity_id'), 'organization_activity',
+                    ['activity_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_organization_activity_activity_id'),
+                  table_name='organization_activity')
+    op.drop_index(op.f('ix_activities_name'), table_name='activities')
+    op.drop_index(op.f('ix_activities_parent_id'), table_name='activities')
+    op.drop_index(op.f('ix_organizations_building_id'), table_name='organizations')
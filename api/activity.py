@@ -1,12 +1,15 @@
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.activity import (create_activity, get_activity_by_id,
-                               get_all_activities)
-from db.session import get_db
-from schemas.activity import ActivityCreate, ActivityOut
+from app.crud.activity import create_activity, get_activity_org_counts, get_all_activities
+from app.cache import response_cache
+from app.dataloader import activity_loader
+from app.pagination import PageParams, page_params, set_next_cursor
+from app.responses import json_response
+from db.session import get_db, get_read_db
+from schemas.activity import ActivityCreate, ActivityOrgCountOut, ActivityOut
 
 router = APIRouter()
 
@@ -16,11 +19,38 @@ async def create_activity_view(activity: ActivityCreate, db: AsyncSession = Depe
     return await create_activity(db, activity.name, activity.parent_id)
 
 
+@router.get("/activities/org_counts", response_model=List[ActivityOrgCountOut])
+async def read_activity_org_counts(request: Request, db: AsyncSession = Depends(get_read_db)):
+    """
+    Все активности с числом организаций в поддереве, например «Еда (1240)».
+    """
+    async def build():
+        return json_response(List[ActivityOrgCountOut], await get_activity_org_counts(db))
+
+    return await response_cache.respond(request, "activity_org_counts", build)
+
+
 @router.get("/activities/{activity_id}", response_model=ActivityOut)
-async def read_activity(activity_id: int, db: AsyncSession = Depends(get_db)):
-    return await get_activity_by_id(db, activity_id)
+async def read_activity(activity_id: int, request: Request):
+    async def build():
+        activity = await activity_loader.load(activity_id)
+        if activity is None:
+            raise HTTPException(status_code=404, detail="Активность не найдена")
+        return json_response(ActivityOut, activity)
+
+    return await response_cache.respond(request, "activities", build)
 
 
 @router.get("/activities/", response_model=List[ActivityOut])
-async def read_all_activities(db: AsyncSession = Depends(get_db)):
-    return await get_all_activities(db)
+async def read_all_activities(
+    request: Request,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db),
+):
+    async def build():
+        activities = await get_all_activities(db, page.limit, page.after_id)
+        response = json_response(List[ActivityOut], activities)
+        set_next_cursor(response, activities, page)
+        return response
+
+    return await response_cache.respond(request, "activities", build)
@@ -1,11 +1,17 @@
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.building import (create_building, get_all_buildings,
-                               get_building_by_id)
-from db.session import get_db
+from app.cache import response_cache
+from app.config import settings
+from app.crud.building import create_building, get_all_buildings, stream_buildings
+from app.dataloader import building_loader
+from app.pagination import PageParams, page_params, set_next_cursor
+from app.responses import json_response
+from app.streaming import ndjson_response
+from db.session import get_db, get_read_db
 from schemas.building import BuildingCreate, BuildingOut
 
 router = APIRouter()
@@ -16,11 +22,30 @@ async def create_building_view(building: BuildingCreate, db: AsyncSession = Depe
     return await create_building(db, building.address, building.latitude, building.longitude)
 
 
+@router.get("/buildings/export", response_class=StreamingResponse)
+async def export_buildings():
+    """Выгрузка всех зданий в NDJSON (по объекту на строку)."""
+    return ndjson_response(
+        lambda db: stream_buildings(db, settings.export_chunk_size), BuildingOut)
+
+
 @router.get("/buildings/{building_id}", response_model=BuildingOut)
-async def read_building(building_id: int, db: AsyncSession = Depends(get_db)):
-    return await get_building_by_id(db, building_id)
+async def read_building(building_id: int, request: Request):
+    async def build():
+        building = await building_loader.load(building_id)
+        if building is None:
+            raise HTTPException(status_code=404, detail="Здание не найдено")
+        return json_response(BuildingOut, building)
+
+    return await response_cache.respond(request, "buildings", build)
 
 
 @router.get("/buildings/", response_model=List[BuildingOut])
-async def read_all_buildings(db: AsyncSession = Depends(get_db)):
-    return await get_all_buildings(db)
+async def read_all_buildings(
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db),
+):
+    buildings = await get_all_buildings(db, page.limit, page.after_id)
+    response = json_response(List[BuildingOut], buildings)
+    set_next_cursor(response, buildings, page)
+    return response
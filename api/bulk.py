@@ -0,0 +1,30 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.crud.bulk import BulkImporter
+from db.session import get_db
+from schemas.bulk import ImportRecord, ImportReport
+
+router = APIRouter()
+
+
+@router.post("/import/", response_model=ImportReport)
+async def import_records_view(
+    records: List[ImportRecord], db: AsyncSession = Depends(get_db)
+):
+    """
+    Пакетный импорт зданий, активностей и организаций.
+    Записи различаются полем type и могут ссылаться друг на друга через ref.
+    Запрос выполняется одной транзакцией: при ошибке не записывается ничего,
+    и тот же набор можно безопасно отправить повторно.
+    """
+    importer = BulkImporter(db, settings.import_batch_size, commit_batches=False)
+    try:
+        await importer.add_many(records)
+        return await importer.finish()
+    except ValueError as exc:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(exc))
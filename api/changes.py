@@ -0,0 +1,35 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.changes import get_changes
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from db.session import get_read_db
+from schemas.changes import ChangesOut
+
+router = APIRouter()
+
+
+@router.get("/changes", response_model=ChangesOut)
+async def read_changes(
+    since: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Лента изменений для синхронизации копий каталога: организации, здания
+    и активности, созданные или изменённые после токена since, и удалённые
+    записи (deleted). Без since лента отдаётся с начала — это полная
+    выгрузка. next_token передаётся как since в следующем запросе; пока
+    has_more, следующую страницу можно запрашивать сразу, иначе — по
+    расписанию.
+    """
+    after = decode_cursor(since, seq=int, source=int, id=int)
+    changes, last, has_more = await get_changes(db, after, limit)
+    last = last or after or (0, 0, 0)
+    return ChangesOut.model_validate({
+        **changes,
+        "next_token": encode_cursor(seq=last[0], source=last[1], id=last[2]),
+        "has_more": has_more,
+    }, from_attributes=True)
@@ -1,14 +1,26 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.organization import (create_organization, get_organization_by_id,
-                                   get_organizations_by_activity, get_organizations_by_activity_tree,
+from app.cache import response_cache
+from app.config import settings
+from app.crud.organization import (create_organization, get_nearest_organizations,
+                                   get_organization_clusters, get_organizations_by_activity,
+                                   get_organizations_by_activity_tree,
                                    get_organizations_by_building, get_organizations_by_geo)
-from app.crud.organization_crud import search_organizations
-from db.session import get_db
-from schemas.organization import OrganizationCreate, OrganizationOut
+from app.crud.organization_crud import (get_organizations_by_phone, search_organizations,
+                                        stream_organizations, suggest_organizations)
+from app.dataloader import organization_loader
+from app.pagination import (NEXT_CURSOR_HEADER, PageParams, decode_cursor, encode_cursor,
+                            page_params, set_next_cursor)
+from app.responses import json_response
+from app.streaming import ndjson_response
+from db.phones import normalize_phone
+from db.session import get_db, get_read_db
+from schemas.organization import (OrganizationClusterOut, OrganizationCreate,
+                                  OrganizationNearOut, OrganizationOut)
 
 router = APIRouter()
 
@@ -18,12 +30,36 @@ async def search_organizations_view(
     name: Optional[str] = Query(None),
     building_address: Optional[str] = Query(None),
     activity_name: Optional[str] = Query(None),
-    db: AsyncSession = Depends(get_db),
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Фильтрация организаций по названию, адресу здания и активности.
     """
-    return await search_organizations(db, name, building_address, activity_name)
+    organizations = await search_organizations(
+        db, name, building_address, activity_name, page.limit, page.after_id)
+    response = json_response(List[OrganizationOut], organizations)
+    set_next_cursor(response, organizations, page)
+    return response
+
+
+@router.get("/organizations/suggest", response_model=List[OrganizationOut])
+async def suggest_organizations_view(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Подсказки для поиска по названию, от наиболее похожих к наименее.
+    """
+    return json_response(List[OrganizationOut], await suggest_organizations(db, q, limit))
+
+
+@router.get("/organizations/export", response_class=StreamingResponse)
+async def export_organizations():
+    """Выгрузка всех организаций в NDJSON (по объекту на строку)."""
+    return ndjson_response(
+        lambda db: stream_organizations(db, settings.export_chunk_size), OrganizationOut)
 
 
 @router.post("/organizations/", response_model=OrganizationOut)
@@ -41,27 +77,58 @@ async def create_organization_view(
     return org
 
 
-@router.get("/organizations/{org_id}", response_model=OrganizationOut)
-async def read_organization(org_id: int, db: AsyncSession = Depends(get_db)):
-    return await get_organization_by_id(db, org_id)
-
-
 @router.get("/organizations/by_building/{building_id}", response_model=List[OrganizationOut])
 async def read_organizations_by_building(
-    building_id: int, db: AsyncSession = Depends(get_db)
+    building_id: int,
+    request: Request,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return await get_organizations_by_building(db, building_id)
+    async def build():
+        organizations = await get_organizations_by_building(
+            db, building_id, page.limit, page.after_id)
+        response = json_response(List[OrganizationOut], organizations)
+        set_next_cursor(response, organizations, page)
+        return response
+
+    return await response_cache.respond(request, "organizations", build)
 
 
 @router.get("/organizations/by_activity/{activity_name}", response_model=List[OrganizationOut])
 async def read_organizations_by_activity(
-    activity_name: str, db: AsyncSession = Depends(get_db)
+    activity_name: str,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db),
+):
+    organizations = await get_organizations_by_activity(
+        db, activity_name, page.limit, page.after_id)
+    response = json_response(List[OrganizationOut], organizations)
+    set_next_cursor(response, organizations, page)
+    return response
+
+
+@router.get("/organizations/by_phone/{number}", response_model=List[OrganizationOut])
+async def read_organizations_by_phone(
+    number: str,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return await get_organizations_by_activity(db, activity_name)
+    """
+    Поиск организаций по номеру телефона в любом формате:
+    «8-900-123-45-67», «+7 (900) 123-45-67» и т.п.
+    """
+    phone = normalize_phone(number)
+    if phone is None:
+        raise HTTPException(status_code=400, detail="Некорректный номер телефона")
+    organizations = await get_organizations_by_phone(db, phone, page.limit, page.after_id)
+    response = json_response(List[OrganizationOut], organizations)
+    set_next_cursor(response, organizations, page)
+    return response
 
 
 @router.get("/organizations/by_geo", response_model=List[OrganizationOut])
 async def read_organizations_by_geo(
+    request: Request,
     latitude: float,
     longitude: float,
     radius_km: Optional[float] = Query(None),
@@ -69,17 +136,113 @@ async def read_organizations_by_geo(
     max_lat: Optional[float] = Query(None),
     min_lon: Optional[float] = Query(None),
     max_lon: Optional[float] = Query(None),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     area = None
     if all(v is not None for v in [min_lat, max_lat, min_lon, max_lon]):
         area = (min_lat, max_lat, min_lon, max_lon)
 
-    return await get_organizations_by_geo(db, latitude, longitude, radius_km, area)
+    async def build():
+        organizations = await get_organizations_by_geo(
+            db, latitude, longitude, radius_km, area)
+        return json_response(List[OrganizationOut], organizations)
+
+    return await response_cache.respond(request, "organizations", build)
+
+
+@router.get("/organizations/clusters", response_model=List[OrganizationClusterOut])
+async def read_organization_clusters(
+    request: Request,
+    min_lat: float = Query(..., ge=-90, le=90),
+    max_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lon: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=22),
+    activity_name: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Кластеры организаций для карты: центроид и число организаций
+    в каждой ячейке сетки, размер которой зависит от zoom.
+    activity_name ограничивает выборку поддеревом активности.
+    """
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Некорректная область")
+
+    async def build():
+        clusters = await get_organization_clusters(
+            db, (min_lat, max_lat, min_lon, max_lon), zoom, activity_name)
+        return json_response(List[OrganizationClusterOut], clusters)
+
+    return await response_cache.respond(request, "organizations", build)
+
+
+@router.get("/organizations/nearest", response_model=List[OrganizationNearOut])
+async def read_nearest_organizations(
+    request: Request,
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Ближайшие организации по возрастанию расстояния.
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    """
+    cursor = decode_cursor(after, d=float, id=int)
+
+    async def build():
+        organizations = await get_nearest_organizations(db, latitude, longitude, limit, cursor)
+        response = json_response(List[OrganizationNearOut], organizations)
+        if len(organizations) == limit:
+            last = organizations[-1]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(d=last.distance_km, id=last.id)
+        return response
+
+    return await response_cache.respond(request, "organizations", build)
 
 
 @router.get("/organizations/by_activity_tree/{activity_name}", response_model=List[OrganizationOut])
 async def read_organizations_by_activity_tree(
-    activity_name: str, db: AsyncSession = Depends(get_db)
+    activity_name: str,
+    request: Request,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return await get_organizations_by_activity_tree(db, activity_name)
+    async def build():
+        organizations = await get_organizations_by_activity_tree(
+            db, activity_name, page.limit, page.after_id)
+        response = json_response(List[OrganizationOut], organizations)
+        set_next_cursor(response, organizations, page)
+        return response
+
+    return await response_cache.respond(request, "organizations", build)
+
+
+# Сколько организаций можно запросить за один вызов GET /organizations
+MAX_MULTI_GET_IDS = 500
+
+
+@router.get("/organizations", response_model=List[OrganizationOut])
+async def read_organizations_by_ids(ids: List[int] = Query(...)):
+    """
+    Несколько организаций за один запрос: /organizations?ids=1&ids=2.
+    Порядок соответствует ids, отсутствующие id пропускаются.
+    """
+    if len(ids) > MAX_MULTI_GET_IDS:
+        raise HTTPException(
+            status_code=400, detail=f"Не больше {MAX_MULTI_GET_IDS} id за запрос")
+    organizations = await organization_loader.load_many(ids)
+    return json_response(
+        List[OrganizationOut],
+        [organization for organization in organizations if organization is not None])
+
+
+# Должен идти последним: иначе перехватывает /organizations/by_geo и т.п.
+@router.get("/organizations/{org_id}", response_model=OrganizationOut)
+async def read_organization(org_id: int):
+    organization = await organization_loader.load(org_id)
+    if organization is None:
+        raise HTTPException(status_code=404, detail="Организация не найдена")
+    return json_response(OrganizationOut, organization)
@@ -0,0 +1,126 @@
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from time import monotonic
+from types import MappingProxyType
+from typing import FrozenSet, Iterable, Mapping, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from db.models.activity import Activity, activity_closure, activity_tree_version
+
+
+@dataclass(frozen=True)
+class ActivityNode:
+    id: int
+    name: str
+    parent_id: Optional[int]
+    depth: int  # 1 — корневая активность
+
+
+@dataclass(frozen=True)
+class ActivityTree:
+    """Неизменяемый снимок дерева активностей."""
+    version: int
+    nodes: Mapping[int, ActivityNode]
+    ids_by_name: Mapping[str, Tuple[int, ...]]
+    children: Mapping[int, Tuple[int, ...]]
+    # Потомки каждой активности, включая её саму
+    descendants: Mapping[int, FrozenSet[int]]
+
+    @classmethod
+    def build(
+        cls,
+        version: int,
+        activities: Iterable[Tuple[int, str, Optional[int]]],
+        closure: Iterable[Tuple[int, int, int]],
+    ) -> "ActivityTree":
+        """Собирает снимок из строк activities и activity_closure."""
+        descendants = defaultdict(set)
+        depths = defaultdict(int)
+        for ancestor_id, descendant_id, _ in closure:
+            descendants[ancestor_id].add(descendant_id)
+            depths[descendant_id] += 1
+
+        nodes = {}
+        ids_by_name = defaultdict(list)
+        children = defaultdict(list)
+        for activity_id, name, parent_id in activities:
+            nodes[activity_id] = ActivityNode(activity_id, name, parent_id, depths[activity_id])
+            ids_by_name[name].append(activity_id)
+            if parent_id is not None:
+                children[parent_id].append(activity_id)
+
+        return cls(
+            version=version,
+            nodes=MappingProxyType(nodes),
+            ids_by_name=MappingProxyType({k: tuple(v) for k, v in ids_by_name.items()}),
+            children=MappingProxyType({k: tuple(v) for k, v in children.items()}),
+            descendants=MappingProxyType(
+                {k: frozenset(v) for k, v in descendants.items()}),
+        )
+
+    def depth(self, activity_id: int) -> int:
+        """Глубина активности; 0, если её нет в снимке."""
+        node = self.nodes.get(activity_id)
+        return node.depth if node else 0
+
+    def subtree_ids(self, name: str) -> FrozenSet[int]:
+        """id активностей с именем name и всех их потомков."""
+        ids = set()
+        for activity_id in self.ids_by_name.get(name, ()):
+            ids |= self.descendants.get(activity_id, {activity_id})
+        return frozenset(ids)
+
+
+_tree: Optional[ActivityTree] = None
+_checked_at = 0.0
+_lock = asyncio.Lock()
+
+
+async def _current_version(db: AsyncSession) -> int:
+    result = await db.execute(select(activity_tree_version.c.version))
+    return result.scalar_one_or_none() or 0
+
+
+async def load_activity_tree(db: AsyncSession) -> ActivityTree:
+    """
+    Перечитывает дерево из БД и атомарно подменяет снимок процесса.
+    """
+    global _tree, _checked_at
+    # Версию читаем первой: гонка с вставкой даст лишнюю перезагрузку,
+    # но не снимок со старыми данными и новой версией
+    version = await _current_version(db)
+    activities = await db.execute(select(Activity.id, Activity.name, Activity.parent_id))
+    closure = await db.execute(select(activity_closure))
+    tree = ActivityTree.build(version, activities.all(), closure.all())
+    # Параллельная загрузка или чтение с основной БД могли успеть положить
+    # более свежий снимок; отстающую реплику тоже считаем проверенной,
+    # чтобы не перечитывать дерево на каждом запросе
+    if _tree is None or tree.version >= _tree.version:
+        _tree = tree
+    _checked_at = monotonic()
+    return _tree
+
+
+async def get_activity_tree(db: AsyncSession) -> ActivityTree:
+    """
+    Снимок дерева активностей. Обращается к БД не чаще раза в
+    activity_tree_check_interval секунд — сверить версию и при
+    необходимости перестроить снимок.
+    """
+    global _checked_at
+    if _tree is not None and monotonic() - _checked_at < settings.activity_tree_check_interval:
+        return _tree
+
+    async with _lock:
+        if _tree is not None and monotonic() - _checked_at < settings.activity_tree_check_interval:
+            return _tree
+        # Реплика может отставать от снимка, собранного с основной БД:
+        # перестраиваем только при более новой версии
+        if _tree is None or await _current_version(db) > _tree.version:
+            return await load_activity_tree(db)
+        _checked_at = monotonic()
+        return _tree
@@ -0,0 +1,187 @@
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Awaitable, Callable, Dict, Optional, Protocol, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+
+from app.config import settings
+from db.session import reads_from_replica
+
+# Заголовки, которые не сохраняются вместе с телом ответа
+_SKIPPED_HEADERS = {"content-length", "content-type", "etag"}
+
+
+class CacheBackend(Protocol):
+    """Хранилище кэша: значения с TTL и счётчики поколений пространств имён."""
+
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    async def generation(self, namespace: str) -> int: ...
+
+    async def bump(self, namespace: str) -> None: ...
+
+
+class MemoryBackend:
+    """LRU в памяти процесса с TTL; каждый воркер держит свою копию."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries[key] = (monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    async def bump(self, namespace: str) -> None:
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+
+class RedisBackend:
+    """Общий для всех воркеров кэш в Redis (нужен пакет redis)."""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("Для CACHE_BACKEND=redis установите пакет redis") from exc
+        self.client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(key, value, px=max(int(ttl * 1000), 1))
+
+    async def generation(self, namespace: str) -> int:
+        return int(await self.client.get(f"generation:{namespace}") or 0)
+
+    async def bump(self, namespace: str) -> None:
+        await self.client.incr(f"generation:{namespace}")
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    status_code: int = 200
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def etag(self) -> str:
+        return '"' + hashlib.blake2b(self.body, digest_size=16).hexdigest() + '"'
+
+    def dumps(self) -> bytes:
+        meta = json.dumps({"status_code": self.status_code, "headers": self.headers})
+        return meta.encode() + b"\n" + self.body
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "CachedResponse":
+        meta, body = raw.split(b"\n", 1)
+        return cls(body=body, **json.loads(meta))
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+class ResponseCache:
+    """
+    Read-through кэш GET-ответов.
+
+    Ключ — пространство имён, его поколение, источник чтения (реплика или
+    основная БД), путь и отсортированные query-параметры. Источник в ключе
+    нужен, чтобы клиент, закреплённый за основной БД после записи, не
+    получил ответ, собранный с отстающей реплики. invalidate() увеличивает
+    поколение: старые ключи больше не читаются и вытесняются по TTL/LRU.
+
+    Реплика догоняет запись не сразу, поэтому ещё write_window секунд
+    после invalidate() ответы с реплики отдаются, но не кэшируются: иначе
+    новое поколение заполнилось бы старыми данными на весь TTL. Ответы
+    несут ETag, совпавший If-None-Match даёт 304 без тела.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, write_window: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.write_window = write_window
+
+    async def _key(self, namespace: str, request: Request, source: str) -> str:
+        generation = await self.backend.generation(namespace)
+        params = urlencode(sorted(request.query_params.multi_items()))
+        return f"{namespace}:{generation}:{source}:{request.url.path}?{params}"
+
+    async def respond(
+        self,
+        request: Request,
+        namespace: str,
+        build: Callable[[], Awaitable[Response]],
+    ) -> Response:
+        source = "replica" if reads_from_replica() else "primary"
+        key = await self._key(namespace, request, source) if self.ttl > 0 else None
+        raw = await self.backend.get(key) if key else None
+        if raw is not None:
+            cached = CachedResponse.loads(raw)
+        else:
+            response = await build()
+            cached = CachedResponse(
+                body=response.body,
+                status_code=response.status_code,
+                headers={name: value for name, value in response.headers.items()
+                         if name not in _SKIPPED_HEADERS},
+            )
+            if key and cached.status_code == 200 and await self._cacheable(namespace, source):
+                await self.backend.set(key, cached.dumps(), self.ttl)
+
+        etag = cached.etag
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(
+            content=cached.body,
+            status_code=cached.status_code,
+            headers={**cached.headers, "ETag": etag},
+            media_type="application/json",
+        )
+
+    async def _cacheable(self, namespace: str, source: str) -> bool:
+        """Ответ с реплики не кэшируется, пока после записи не прошло write_window."""
+        return source == "primary" or await self.backend.get(f"written:{namespace}") is None
+
+    async def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            await self.backend.bump(namespace)
+            if self.write_window > 0:
+                await self.backend.set(f"written:{namespace}", b"1", self.write_window)
+
+
+def create_backend() -> CacheBackend:
+    if settings.cache_backend == "redis":
+        return RedisBackend(settings.cache_url)
+    return MemoryBackend(settings.cache_max_entries)
+
+
+response_cache = ResponseCache(create_backend(), settings.cache_ttl, settings.primary_pin_seconds)
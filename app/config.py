@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -6,6 +8,41 @@ class Settings(BaseSettings):
     db_url: str = Field(..., alias="DB_URL")
     db_url_sync: str = Field(..., alias="DB_URL_SYNC")
     api_key: str = Field(..., alias="API_KEY")
+    # Пул соединений и логирование SQL
+    db_echo: bool = Field(False, alias="DB_ECHO")
+    db_pool_size: int = Field(5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30.0, alias="DB_POOL_TIMEOUT")
+    # Кэш скомпилированных SQLAlchemy-запросов (на engine) и подготовленных
+    # asyncpg-выражений (на соединение); 0 выключает кэш
+    db_query_cache_size: int = Field(500, alias="DB_QUERY_CACHE_SIZE")
+    db_statement_cache_size: int = Field(100, alias="DB_STATEMENT_CACHE_SIZE")
+    # Сколько соединений пула открыть и прогреть при старте (не больше DB_POOL_SIZE)
+    warmup_connections: int = Field(5, alias="WARMUP_CONNECTIONS")
+    # Реплика для чтения (GET); без неё всё читается с primary
+    db_read_url: Optional[str] = Field(None, alias="DB_READ_URL")
+    replica_check_interval: float = Field(5.0, alias="REPLICA_CHECK_INTERVAL")
+    replica_max_lag: float = Field(10.0, alias="REPLICA_MAX_LAG")  # сек
+    # Сколько секунд после записи клиент читает с primary (read-your-writes)
+    primary_pin_seconds: float = Field(5.0, alias="PRIMARY_PIN_SECONDS")
+    # Как часто (сек) сверять версию снимка дерева активностей с БД
+    activity_tree_check_interval: float = Field(
+        5.0, alias="ACTIVITY_TREE_CHECK_INTERVAL")
+    # Размер порции серверного курсора для NDJSON-выгрузок
+    export_chunk_size: int = Field(1000, alias="EXPORT_CHUNK_SIZE")
+    # Размер пачки при массовом импорте
+    import_batch_size: int = Field(1000, alias="IMPORT_BATCH_SIZE")
+    # Кэш GET-ответов: memory — LRU в процессе, redis — общий для воркеров
+    cache_backend: Literal["memory", "redis"] = Field("memory", alias="CACHE_BACKEND")
+    cache_url: Optional[str] = Field(None, alias="CACHE_URL")
+    cache_ttl: float = Field(60.0, alias="CACHE_TTL")  # 0 — кэш выключен
+    cache_max_entries: int = Field(1024, alias="CACHE_MAX_ENTRIES")
+    # Ответы со списками кодируются orjson без повторной валидации (нужен orjson)
+    fast_json: bool = Field(False, alias="FAST_JSON")
+    # Откуда читать by_geo и организации/здания по id: db — живая БД,
+    # snapshot — файл SNAPSHOT_PATH из scripts.build_snapshot (без БД)
+    data_source: Literal["db", "snapshot"] = Field("db", alias="DATA_SOURCE")
+    snapshot_path: Optional[str] = Field(None, alias="SNAPSHOT_PATH")
 
     class Config:
         extra = "ignore"  # <- вот это ключевое
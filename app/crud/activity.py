@@ -1,12 +1,22 @@
 from typing import List, Optional
 
 from fastapi import HTTPException
+from sqlalchemy import Integer, Row, any_, bindparam, func
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from db.models.activity import Activity
+from app.activity_tree import ActivityNode, get_activity_tree, load_activity_tree
+from app.cache import response_cache
+from app.pagination import keyset
+from db.models.activity import Activity, activity_org_counts
 from schemas.activity import ActivityOut
 
+# Собраны заранее, как и запросы зданий по id (см. app.crud.building)
+_ACTIVITY_BY_ID = select(Activity).where(Activity.id == bindparam("activity_id"))
+_ACTIVITIES_BY_IDS = select(Activity).where(
+    Activity.id == any_(bindparam("activity_ids", type_=ARRAY(Integer))))
+
 
 async def create_activity(
     db: AsyncSession, name: str, parent_id: Optional[int] = None
@@ -16,6 +26,9 @@ async def create_activity(
     """
     if parent_id is not None:
         depth = await get_activity_depth(db, parent_id)
+        if depth == 0:
+            raise HTTPException(
+                status_code=404, detail="Родительская активность не найдена")
         if depth >= 3:
             raise HTTPException(
                 status_code=400,
@@ -26,71 +39,68 @@ async def create_activity(
     db.add(activity)
     await db.commit()
     await db.refresh(activity)
+    await load_activity_tree(db)
+    await response_cache.invalidate("activities", "activity_org_counts")
     return ActivityOut.model_validate(activity)
 
 
 async def get_activity_by_id(db: AsyncSession, activity_id: int) -> Activity | None:
-    result = await db.execute(select(Activity).where(Activity.id == activity_id))
+    result = await db.execute(_ACTIVITY_BY_ID, {"activity_id": activity_id})
     return result.scalar_one_or_none()
 
 
-async def get_all_activities(db: AsyncSession) -> list[Activity]:
-    result = await db.execute(select(Activity))
+async def get_activities_by_ids(db: AsyncSession, activity_ids: List[int]) -> list[Activity]:
+    """Активности с указанными id одним запросом; отсутствующие пропускаются."""
+    result = await db.execute(_ACTIVITIES_BY_IDS, {"activity_ids": activity_ids})
     return result.scalars().all()
 
 
-async def get_activity_with_descendants(
-    db: AsyncSession, root_name: str
-) -> List[Activity]:
-    """
-    Получает активность по имени и её потомков до 3 уровня вложенности.
-    """
-    # Находим корневую активность по имени
-    result = await db.execute(select(Activity).where(Activity.name == root_name))
-    root_activity = result.scalar_one_or_none()
-    if not root_activity:
-        return []
-
-    # Собираем ID всех потомков вручную (до 3 уровней)
-    ids_to_check = [root_activity.id]
-    all_activities = [root_activity]
+async def get_all_activities(
+    db: AsyncSession, limit: Optional[int] = None, after_id: Optional[int] = None
+) -> list[Row]:
+    """Страница активностей строками в порядке полей ActivityOut."""
+    query = select(Activity.id, Activity.name, Activity.parent_id)
+    result = await db.execute(keyset(query, Activity.id, after_id, limit))
+    return result.all()
 
-    result = await db.execute(select(Activity).where(Activity.parent_id == root_activity.id))
-    level1 = result.scalars().all()
-    all_activities.extend(level1)
-    ids_to_check.extend([act.id for act in level1])
 
-    if level1:
-        result = await db.execute(select(Activity).where(Activity.parent_id.in_([a.id for a in level1])))
-        level2 = result.scalars().all()
-        all_activities.extend(level2)
-        ids_to_check.extend([act.id for act in level2])
+async def get_activity_org_counts(db: AsyncSession) -> list[Row]:
+    """
+    Все активности с числом организаций в их поддереве из поддерживаемой
+    таблицы activity_org_counts — без COUNT по связям.
+    """
+    query = (
+        select(
+            Activity.id,
+            Activity.name,
+            Activity.parent_id,
+            func.coalesce(activity_org_counts.c.organization_count, 0)
+            .label("organization_count"),
+        )
+        .outerjoin(activity_org_counts, activity_org_counts.c.activity_id == Activity.id)
+        .order_by(Activity.id)
+    )
+    result = await db.execute(query)
+    return result.all()
 
-    if level2:
-        result = await db.execute(select(Activity).where(Activity.parent_id.in_([a.id for a in level2])))
-        level3 = result.scalars().all()
-        all_activities.extend(level3)
-        ids_to_check.extend([act.id for act in level3])
 
-    return all_activities
+async def get_activity_with_descendants(
+    db: AsyncSession, root_name: str
+) -> List[ActivityNode]:
+    """
+    Получает активность по имени и всех её потомков из снимка дерева.
+    """
+    tree = await get_activity_tree(db)
+    return [tree.nodes[activity_id] for activity_id in sorted(tree.subtree_ids(root_name))]
 
 
 async def get_activity_depth(db: AsyncSession, activity_id: int) -> int:
     """
-    Рекурсивно вычисляет глубину активности по parent_id.
-    Максимум возвращает 3.
+    Глубина активности (1 — корневая) по снимку дерева.
+    Для несуществующей активности возвращает 0.
     """
-    depth = 1
-    current_id = activity_id
-
-    while True:
-        result = await db.execute(select(Activity).where(Activity.id == current_id))
-        activity = result.scalar_one_or_none()
-        if activity is None or activity.parent_id is None:
-            break
-        depth += 1
-        if depth > 3:
-            break
-        current_id = activity.parent_id
-
-    return depth
+    tree = await get_activity_tree(db)
+    if activity_id not in tree.nodes:
+        # Активность могла появиться в другом воркере — перечитываем снимок
+        tree = await load_activity_tree(db)
+    return tree.depth(activity_id)
@@ -1,8 +1,22 @@
+from typing import AsyncIterator, List, Optional, Sequence
+
+from sqlalchemy import Integer, Row, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.cache import response_cache
+from app.pagination import keyset
+from app.snapshot import get_snapshot
 from db.models.building import Building
 
+# Запросы по id собраны один раз, значения передаются параметрами при
+# выполнении: построение select() и его ключ кэша компиляции не
+# пересчитываются на каждый вызов
+_BUILDING_BY_ID = select(Building).where(Building.id == bindparam("building_id"))
+_BUILDINGS_BY_IDS = select(Building).where(
+    Building.id == any_(bindparam("building_ids", type_=ARRAY(Integer))))
+
 
 async def create_building(db: AsyncSession, address: str, latitude: float, longitude: float) -> Building:
     new_building = Building(
@@ -10,14 +24,41 @@ async def create_building(db: AsyncSession, address: str, latitude: float, longi
     db.add(new_building)
     await db.commit()
     await db.refresh(new_building)
+    await response_cache.invalidate("buildings")
     return new_building
 
 
 async def get_building_by_id(db: AsyncSession, building_id: int) -> Building | None:
-    result = await db.execute(select(Building).where(Building.id == building_id))
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return next(iter(snapshot.buildings([building_id])), None)
+    result = await db.execute(_BUILDING_BY_ID, {"building_id": building_id})
     return result.scalar_one_or_none()
 
 
-async def get_all_buildings(db: AsyncSession) -> list[Building]:
-    result = await db.execute(select(Building))
+async def get_buildings_by_ids(db: AsyncSession, building_ids: List[int]) -> list[Building]:
+    """Здания с указанными id одним запросом; отсутствующие пропускаются."""
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return snapshot.buildings(building_ids)
+    result = await db.execute(_BUILDINGS_BY_IDS, {"building_ids": building_ids})
     return result.scalars().all()
+
+
+async def get_all_buildings(
+    db: AsyncSession, limit: Optional[int] = None, after_id: Optional[int] = None
+) -> list[Row]:
+    """Страница зданий строками в порядке полей BuildingOut, без ORM-объектов."""
+    query = select(Building.id, Building.address, Building.latitude, Building.longitude)
+    result = await db.execute(keyset(query, Building.id, after_id, limit))
+    return result.all()
+
+
+async def stream_buildings(
+    db: AsyncSession, chunk_size: int
+) -> AsyncIterator[Sequence[Building]]:
+    """Все здания порциями по chunk_size через серверный курсор."""
+    result = await db.stream(
+        select(Building).order_by(Building.id).execution_options(yield_per=chunk_size))
+    async for chunk in result.scalars().partitions():
+        yield chunk
@@ -0,0 +1,247 @@
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.activity_tree import load_activity_tree
+from app.cache import response_cache
+from db.models.activity import Activity, activity_closure, closure_statements
+from db.models.building import Building
+from db.models.change_feed import change_seq
+from db.models.organization import Organization, org_count_statement, organization_activity
+from db.phones import normalize_phones
+from schemas.bulk import (ActivityImport, BuildingImport, ImportRecord,
+                          ImportReport, OrganizationImport)
+
+
+class BulkImporter:
+    """
+    Пакетная загрузка зданий, активностей и организаций.
+
+    Записи копятся в буферах и сбрасываются пачками по batch_size:
+    сначала здания, затем активности (уровень за уровнем), затем
+    организации через INSERT ... RETURNING, ссылки ref разрешаются в
+    полученные id. Ссылаться можно только на записи, встретившиеся в потоке
+    раньше. При commit_batches каждая пачка коммитится отдельно (длинные
+    выгрузки из скриптов); иначе всё пишется одной транзакцией, которую
+    коммитит finish(), и ошибка в любой пачке не оставляет частичных данных.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        batch_size: int = 1000,
+        progress: Optional[Callable[[ImportReport], None]] = None,
+        commit_batches: bool = True,
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.progress = progress
+        self.commit_batches = commit_batches
+        self.report = ImportReport()
+        self._started = perf_counter()
+        self._buildings: List[BuildingImport] = []
+        self._activities: List[ActivityImport] = []
+        self._organizations: List[OrganizationImport] = []
+        self._building_refs: Dict[str, int] = {}
+        self._activity_refs: Dict[str, int] = {}
+        # ref, встреченные в потоке, включая ещё не записанные: повтор
+        # отклоняется до вставки, иначе ссылки разрешались бы в последний
+        self._seen_refs: Dict[type, Set[str]] = {BuildingImport: set(), ActivityImport: set()}
+        # Глубины уже загруженных этим импортом активностей
+        self._depths: Dict[int, int] = {}
+        # Пространства имён кэша, которые нужно сбросить после коммита
+        self._namespaces: Set[str] = set()
+
+    async def add(self, record: ImportRecord) -> None:
+        seen = self._seen_refs.get(type(record))
+        if seen is not None and record.ref is not None:
+            if record.ref in seen:
+                raise ValueError(f"Повторяющийся ref: {record.ref}")
+            seen.add(record.ref)
+
+        if isinstance(record, BuildingImport):
+            self._buildings.append(record)
+        elif isinstance(record, ActivityImport):
+            self._activities.append(record)
+        else:
+            self._organizations.append(record)
+
+        pending = len(self._buildings) + len(self._activities) + len(self._organizations)
+        if pending >= self.batch_size:
+            await self.flush()
+
+    async def add_many(self, records: Iterable[ImportRecord]) -> None:
+        for record in records:
+            await self.add(record)
+
+    async def flush(self) -> None:
+        """Записывает накопленные записи; при commit_batches — и коммитит их."""
+        if self._buildings:
+            self._namespaces.add("buildings")
+        if self._organizations:
+            self._namespaces.update(("organizations", "activity_org_counts"))
+        await self._flush_buildings()
+        if await self._flush_activities():
+            self._namespaces.update(("activities", "activity_org_counts"))
+        await self._flush_organizations()
+        if self.commit_batches:
+            await self._commit()
+        self._update_rate()
+        if self.progress:
+            self.progress(self.report)
+
+    async def finish(self) -> ImportReport:
+        await self.flush()
+        if not self.commit_batches:
+            await self._commit()
+        return self.report
+
+    async def _commit(self) -> None:
+        # Дерево и кэш обновляются только после коммита: иначе процесс
+        # увидел бы данные транзакции, которая ещё может откатиться
+        await self.db.commit()
+        if "activities" in self._namespaces:
+            await load_activity_tree(self.db)
+        await response_cache.invalidate(*self._namespaces)
+        self._namespaces.clear()
+
+    def _update_rate(self) -> None:
+        report = self.report
+        report.seconds = perf_counter() - self._started
+        total = report.buildings + report.activities + report.organizations
+        report.rows_per_second = total / report.seconds if report.seconds else 0.0
+
+    async def _flush_buildings(self) -> None:
+        pending, self._buildings = self._buildings, []
+        if not pending:
+            return
+
+        seq = await self.db.run_sync(change_seq)
+        result = await self.db.scalars(
+            insert(Building).returning(Building.id, sort_by_parameter_order=True),
+            [{**record.model_dump(include={"address", "latitude", "longitude"}),
+              "change_seq": seq}
+             for record in pending],
+        )
+        for record, building_id in zip(pending, result.all()):
+            if record.ref is not None:
+                self._building_refs[record.ref] = building_id
+        self.report.buildings += len(pending)
+
+    async def _parent_depths(self, parent_ids: Set[int]) -> Dict[int, int]:
+        """Глубины существующих родителей одним запросом по activity_closure."""
+        unknown = parent_ids - self._depths.keys()
+        if unknown:
+            result = await self.db.execute(
+                select(activity_closure.c.descendant_id, func.count())
+                .where(activity_closure.c.descendant_id.in_(unknown))
+                .group_by(activity_closure.c.descendant_id)
+            )
+            self._depths.update(result.all())
+            missing = unknown - self._depths.keys()
+            if missing:
+                raise ValueError(f"Родительские активности не найдены: {sorted(missing)}")
+        return self._depths
+
+    async def _flush_activities(self) -> bool:
+        pending, self._activities = self._activities, []
+        if not pending:
+            return False
+
+        depths = await self._parent_depths(
+            {record.parent_id for record in pending
+             if record.parent_ref is None and record.parent_id is not None})
+
+        seq = await self.db.run_sync(change_seq)
+        # Вставляем уровнями: запись готова, когда известен id её родителя
+        while pending:
+            level, rest = [], []
+            for record in pending:
+                if record.parent_ref is None:
+                    level.append((record, record.parent_id))
+                elif record.parent_ref in self._activity_refs:
+                    level.append((record, self._activity_refs[record.parent_ref]))
+                else:
+                    rest.append(record)
+            if not level:
+                refs = sorted({record.parent_ref for record in rest})
+                raise ValueError(f"Неизвестные parent_ref: {refs}")
+
+            level_depths = [1 if parent_id is None else depths[parent_id] + 1
+                            for _, parent_id in level]
+            if max(level_depths) > 3:
+                raise ValueError(
+                    "Превышен допустимый уровень вложенности (максимум 3 уровня)")
+
+            result = await self.db.scalars(
+                insert(Activity).returning(Activity.id, sort_by_parameter_order=True),
+                [{"name": record.name, "parent_id": parent_id, "change_seq": seq}
+                 for record, parent_id in level],
+            )
+            ids = result.all()
+            for statement in closure_statements(
+                    [(activity_id, parent_id) for activity_id, (_, parent_id) in zip(ids, level)]):
+                await self.db.execute(statement)
+
+            for activity_id, depth, (record, _) in zip(ids, level_depths, level):
+                depths[activity_id] = depth
+                if record.ref is not None:
+                    self._activity_refs[record.ref] = activity_id
+            self.report.activities += len(level)
+            pending = rest
+        return True
+
+    async def _missing_ids(self, model, ids: Set[int]) -> Set[int]:
+        if not ids:
+            return set()
+        result = await self.db.scalars(select(model.id).where(model.id.in_(ids)))
+        return ids - set(result.all())
+
+    async def _flush_organizations(self) -> None:
+        pending, self._organizations = self._organizations, []
+        if not pending:
+            return
+
+        try:
+            building_ids = [
+                self._building_refs[record.building_ref]
+                if record.building_ref is not None else record.building_id
+                for record in pending
+            ]
+            activity_ids = [
+                set(record.activity_ids)
+                | {self._activity_refs[ref] for ref in record.activity_refs}
+                for record in pending
+            ]
+        except KeyError as exc:
+            raise ValueError(f"Неизвестная ссылка: {exc.args[0]}")
+        if None in building_ids:
+            raise ValueError("У организации не указано здание")
+
+        missing = await self._missing_ids(Building, set(building_ids))
+        if missing:
+            raise ValueError(f"Здания не найдены: {sorted(missing)}")
+        missing = await self._missing_ids(Activity, set().union(*activity_ids))
+        if missing:
+            raise ValueError(f"Активности не найдены: {sorted(missing)}")
+
+        seq = await self.db.run_sync(change_seq)
+        result = await self.db.scalars(
+            insert(Organization).returning(Organization.id, sort_by_parameter_order=True),
+            [{"name": record.name, "inn": record.inn, "phones": record.phones,
+              "phones_e164": normalize_phones(record.phones), "building_id": building_id,
+              "change_seq": seq}
+             for record, building_id in zip(pending, building_ids)],
+        )
+        organization_ids = result.all()
+        links = [
+            {"organization_id": organization_id, "activity_id": activity_id}
+            for organization_id, ids in zip(organization_ids, activity_ids)
+            for activity_id in ids
+        ]
+        if links:
+            await self.db.execute(insert(organization_activity), links)
+            await self.db.execute(org_count_statement(organization_ids))
+        self.report.organizations += len(pending)
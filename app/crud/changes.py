@@ -0,0 +1,76 @@
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Row, select, true, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.organization_crud import organization_out_query
+from db.models.activity import Activity
+from db.models.building import Building
+from db.models.change_feed import tombstones
+from db.models.organization import Organization
+
+# Ключ позиции в ленте: (change_seq, номер источника, id). Внутри одного
+# change_seq источники идут в порядке этого списка, строки — по id
+CHANGE_SOURCES = ("organizations", "buildings", "activities", "deleted")
+
+ChangeKey = Tuple[int, int, int]
+
+
+def _after(seq_column, id_column, source: int, after: Optional[ChangeKey]):
+    """Условие «строка источника source идёт после ключа after»."""
+    if after is None:
+        return true()
+    seq, after_source, after_id = after
+    if source < after_source:
+        return seq_column > seq
+    if source == after_source:
+        return tuple_(seq_column, id_column) > tuple_(seq, after_id)
+    return seq_column >= seq
+
+
+def _source_queries(after: Optional[ChangeKey]) -> list:
+    """
+    Запросы по источникам в порядке CHANGE_SOURCES. В конце каждой строки —
+    change_seq и change_id, её ключ в ленте (для удалений это id записи
+    в tombstones, а не удалённой строки).
+    """
+    deleted = select(tombstones.c.entity, tombstones.c.entity_id.label("id"))
+    sources = [
+        (organization_out_query(), Organization.change_seq, Organization.id),
+        (select(Building.id, Building.address, Building.latitude, Building.longitude),
+         Building.change_seq, Building.id),
+        (select(Activity.id, Activity.name, Activity.parent_id),
+         Activity.change_seq, Activity.id),
+        (deleted, tombstones.c.change_seq, tombstones.c.id),
+    ]
+    return [
+        query.add_columns(seq_column.label("change_seq"), id_column.label("change_id"))
+        .where(_after(seq_column, id_column, source, after))
+        .order_by(seq_column, id_column)
+        for source, (query, seq_column, id_column) in enumerate(sources)
+    ]
+
+
+async def get_changes(
+    db: AsyncSession, after: Optional[ChangeKey], limit: int
+) -> Tuple[Dict[str, List[Row]], Optional[ChangeKey], bool]:
+    """
+    Не больше limit изменений после ключа after (None — с начала) по всем
+    источникам вместе, в порядке ключа. Возвращает строки по источникам,
+    ключ последней отданной строки (None, если отдавать нечего) и признак
+    того, что изменений больше limit.
+
+    Каждый источник читается keyset-запросом по индексу (change_seq, id)
+    не дальше limit + 1 строк, затем строки сливаются по ключу.
+    """
+    merged = []
+    for source, query in enumerate(_source_queries(after)):
+        result = await db.execute(query.limit(limit + 1))
+        merged += [((row.change_seq, source, row.change_id), row) for row in result.all()]
+    merged.sort(key=lambda item: item[0])
+
+    page = merged[:limit]
+    changes: Dict[str, List[Row]] = {name: [] for name in CHANGE_SOURCES}
+    for (_, source, _), row in page:
+        changes[CHANGE_SOURCES[source]].append(row)
+    return changes, page[-1][0] if page else None, len(merged) > limit
@@ -1,51 +1,87 @@
-from math import asin, cos, radians, sin, sqrt
+from functools import lru_cache
+from math import pi
 from typing import List, Optional, Tuple
 
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import Integer, Row, and_, any_, bindparam, case, func, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload, selectinload
 
-from app.crud.activity import get_activity_with_descendants
+from app.activity_tree import get_activity_tree
+from app.cache import response_cache
+from app.crud.organization_crud import organization_out_query
+from app.geo import (EARTH_RADIUS_KM, Area, bounding_boxes, cluster_cell_size,
+                     haversine_sql, within_radius)
+from app.pagination import keyset, keyset_bound
+from app.singleflight import single_flight
+from app.snapshot import get_snapshot
 from db.models.activity import Activity
-from db.models.organization import Organization
+from db.models.building import Building
+from db.models.organization import Organization, org_count_statement, organization_activity
 from schemas.organization import OrganizationOut
 
-EARTH_RADIUS_KM = 6371.0  # Радиус Земли в км
+# Горячие запросы фиксированной формы собраны заранее, значения — параметрами
+_ORGANIZATION_BY_ID = organization_out_query().where(Organization.id == bindparam("org_id"))
+_ORGANIZATIONS_BY_IDS = organization_out_query().where(
+    Organization.id == any_(bindparam("org_ids", type_=ARRAY(Integer))))
 
 
-async def get_organization_by_id(db: AsyncSession, org_id: int) -> Optional[Organization]:
+@lru_cache(maxsize=None)
+def _by_building_statement(after_id: bool, limit: bool):
+    query = organization_out_query().where(
+        Organization.building_id == bindparam("building_id"))
+    return keyset_bound(query, Organization.id, after_id, limit)
+
+
+@lru_cache(maxsize=None)
+def _by_activity_statement(after_id: bool, limit: bool):
+    query = organization_out_query().where(
+        Organization.activities.any(Activity.name == bindparam("activity_name")))
+    return keyset_bound(query, Organization.id, after_id, limit)
+
+
+async def get_organization_by_id(db: AsyncSession, org_id: int) -> Optional[Row]:
     """Получить организацию по id."""
-    query = select(Organization).filter(Organization.id == org_id)
-    result = await db.execute(query)
-    return result.scalar_one_or_none()
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return next(iter(snapshot.organizations([org_id])), None)
+    result = await db.execute(_ORGANIZATION_BY_ID, {"org_id": org_id})
+    return result.one_or_none()
+
+
+async def get_organizations_by_ids(db: AsyncSession, org_ids: List[int]) -> List[Row]:
+    """Организации с указанными id одним запросом; отсутствующие пропускаются."""
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return snapshot.organizations(org_ids)
+    result = await db.execute(_ORGANIZATIONS_BY_IDS, {"org_ids": org_ids})
+    return result.all()
 
 
 async def get_organizations_by_building(
-    db: AsyncSession, building_id: int
-) -> List[Organization]:
+    db: AsyncSession,
+    building_id: int,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None
+) -> List[Row]:
     """Получить список организаций по зданию."""
-    query = (
-        select(Organization)
-        .filter(Organization.building_id == building_id)
-        # Можно подгрузить связи
-        .options(selectinload(Organization.activities))
-    )
-    result = await db.execute(query)
-    return result.scalars().all()
+    query = _by_building_statement(after_id is not None, limit is not None)
+    result = await db.execute(
+        query, {"building_id": building_id, "after_id": after_id, "limit": limit})
+    return result.all()
 
 
 async def get_organizations_by_activity(
-    db: AsyncSession, activity_name: str
-) -> List[Organization]:
+    db: AsyncSession,
+    activity_name: str,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None
+) -> List[Row]:
     """Получить список организаций по виду деятельности."""
-    query = (
-        select(Organization)
-        .join(Organization.activities)
-        .filter(Activity.name == activity_name)
-    )
-    result = await db.execute(query)
-    return result.scalars().all()
+    query = _by_activity_statement(after_id is not None, limit is not None)
+    result = await db.execute(
+        query, {"activity_name": activity_name, "after_id": after_id, "limit": limit})
+    return result.all()
 
 
 async def create_organization(
@@ -84,9 +120,12 @@ async def create_organization(
 
     organization.activities.clear()
     organization.activities.extend(activities)
+    await db.flush()
+    await db.execute(org_count_statement([organization.id]))
 
     await db.commit()
     await db.refresh(organization, attribute_names=["activities"])
+    await response_cache.invalidate("organizations", "activity_org_counts")
 
     return OrganizationOut(
         id=organization.id,
@@ -98,66 +137,173 @@ async def create_organization(
     )
 
 
-def haversine(lat1, lon1, lat2, lon2):
-    """Расчет расстояния между двумя точками (км)."""
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat/2)**2 + cos(lat1)*cos(lat2)*sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    return EARTH_RADIUS_KM * c
+def _in_area(area: Area):
+    min_lat, max_lat, min_lon, max_lon = area
+    return and_(
+        Building.latitude.between(min_lat, max_lat),
+        Building.longitude.between(min_lon, max_lon),
+    )
 
 
+@single_flight
 async def get_organizations_by_geo(
     db: AsyncSession,
     latitude: float,
     longitude: float,
     radius_km: Optional[float] = None,
     # (min_lat, max_lat, min_lon, max_lon)
-    area: Optional[Tuple[float, float, float, float]] = None
-) -> List[Organization]:
-    query = select(Organization).options(joinedload(Organization.building))
+    area: Optional[Area] = None
+) -> List[Row]:
+    """
+    Поиск организаций в радиусе или в прямоугольной области.
+
+    Отбор кандидатов выполняется в БД по индексу (latitude, longitude),
+    точная проверка расстояния — одним векторизованным проходом
+    только по попавшим в прямоугольник зданиям. При DATA_SOURCE=snapshot
+    то же выполняется по снимку, без БД.
+    """
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return snapshot.organizations_by_geo(latitude, longitude, radius_km, area)
+    if radius_km:
+        boxes = bounding_boxes(latitude, longitude, radius_km)
+    elif area:
+        boxes = [area]
+    else:
+        return []
 
+    query = (
+        organization_out_query()
+        .add_columns(Building.latitude, Building.longitude)
+        .join(Organization.building)
+        .where(or_(*(_in_area(box) for box in boxes)))
+    )
     result = await db.execute(query)
-    organizations = result.scalars().all()
+    rows = result.all()
+
+    if not radius_km:
+        return rows
+
+    count = len(rows)
+    lats = np.fromiter((row.latitude for row in rows), dtype=np.float64, count=count)
+    lons = np.fromiter((row.longitude for row in rows), dtype=np.float64, count=count)
+    mask, _ = within_radius(latitude, longitude, lats, lons, radius_km)
+    return [row for row, inside in zip(rows, mask) if inside]
+
+
+# Начальный радиус поиска ближайших и предел (половина окружности Земли)
+KNN_START_RADIUS_KM = 1.0
+KNN_MAX_RADIUS_KM = pi * EARTH_RADIUS_KM
 
-    filtered = []
-    for org in organizations:
-        bld = org.building
-        if bld is None:
-            continue
 
-        if radius_km:
-            distance = haversine(latitude, longitude,
-                                 bld.latitude, bld.longitude)
-            if distance <= radius_km:
-                filtered.append(org)
-        elif area:
-            min_lat, max_lat, min_lon, max_lon = area
-            if min_lat <= bld.latitude <= max_lat and min_lon <= bld.longitude <= max_lon:
-                filtered.append(org)
+@single_flight
+async def get_nearest_organizations(
+    db: AsyncSession,
+    latitude: float,
+    longitude: float,
+    limit: int = 20,
+    # (distance_km, id) последней записи предыдущей страницы
+    after: Optional[Tuple[float, int]] = None
+) -> List[Row]:
+    """
+    Ближайшие к точке организации, отсортированные по (расстоянию, id).
+
+    Радиус поиска растёт от KNN_START_RADIUS_KM в 4 раза за шаг, пока
+    в круг не попадёт limit организаций, поэтому из БД никогда не
+    выбирается больше одной страницы. Курсор after задаёт keyset-пагинацию.
+    """
+    distance = haversine_sql(Building.latitude, Building.longitude, latitude, longitude)
+    radius = KNN_START_RADIUS_KM
+    if after is not None:
+        radius = max(radius, after[0] * 2)
 
-    return filtered
+    while True:
+        radius = min(radius, KNN_MAX_RADIUS_KM)
+        query = (
+            organization_out_query()
+            .add_columns(distance.label("distance_km"))
+            .join(Organization.building)
+            .where(or_(*(_in_area(box) for box in bounding_boxes(latitude, longitude, radius))))
+            .where(distance <= radius)
+            .order_by(distance, Organization.id)
+            .limit(limit)
+        )
+        if after is not None:
+            query = query.where(tuple_(distance, Organization.id) > tuple_(*after))
+        result = await db.execute(query)
+        rows = result.all()
+        # Всё, что ближе найденного limit-го, гарантированно лежит внутри круга
+        if len(rows) == limit or radius >= KNN_MAX_RADIUS_KM:
+            break
+        radius *= 4
 
+    return rows
 
+
+@single_flight
 async def get_organizations_by_activity_tree(
-    db: AsyncSession, root_activity_name: str
-) -> List[Organization]:
+    db: AsyncSession,
+    root_activity_name: str,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None
+) -> List[Row]:
     """
     Поиск организаций, связанных с видом деятельности и его потомками.
+    Поддерево берётся из снимка дерева активностей, в БД — один запрос.
     """
-    activities = await get_activity_with_descendants(db, root_activity_name)
-    if not activities:
+    tree = await get_activity_tree(db)
+    activity_ids = tree.subtree_ids(root_activity_name)
+    if not activity_ids:
         return []
 
-    activity_ids = [act.id for act in activities]
+    linked = select(organization_activity.c.organization_id).where(
+        organization_activity.c.activity_id.in_(activity_ids))
 
-    result = await db.execute(
-        select(Organization)
-        .join(Organization.activities)
-        .where(Activity.id.in_(activity_ids))
-        .options(joinedload(Organization.activities), joinedload(Organization.building))
-        .distinct()
+    query = organization_out_query().where(Organization.id.in_(linked))
+    result = await db.execute(keyset(query, Organization.id, after_id, limit))
+    return result.all()
+
+
+@single_flight
+async def get_organization_clusters(
+    db: AsyncSession,
+    area: Area,
+    zoom: int,
+    activity_name: Optional[str] = None
+) -> List[Row]:
+    """
+    Кластеры организаций в области: центроид и число организаций в каждой
+    ячейке сетки (см. cluster_cell_size). Группировка выполняется в БД,
+    размер ответа ограничен числом ячеек, а не плотностью точек.
+    Фильтр activity_name учитывает всё поддерево активности.
+    """
+    cell = cluster_cell_size(area, zoom)
+    count = func.count(Organization.id)
+    cell_y = func.floor(Building.latitude / cell).label("cell_y")
+    cell_x = func.floor(Building.longitude / cell).label("cell_x")
+    query = (
+        select(
+            func.avg(Building.latitude).label("latitude"),
+            func.avg(Building.longitude).label("longitude"),
+            count.label("count"),
+            case((count == 1, func.min(Organization.id))).label("organization_id"),
+            cell_y,
+            cell_x,
+        )
+        .select_from(Organization)
+        .join(Organization.building)
+        .where(_in_area(area))
+        .group_by(cell_y, cell_x)
+        .order_by(cell_y, cell_x)
     )
-    organizations = result.scalars().all()
-    return organizations
+    if activity_name is not None:
+        tree = await get_activity_tree(db)
+        activity_ids = tree.subtree_ids(activity_name)
+        if not activity_ids:
+            return []
+        query = query.where(Organization.id.in_(
+            select(organization_activity.c.organization_id)
+            .where(organization_activity.c.activity_id.in_(activity_ids))))
+
+    result = await db.execute(query)
+    return result.all()
@@ -1,12 +1,61 @@
-from typing import List, Optional
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import Row, bindparam, func, literal, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
 
+from app.pagination import keyset_bound
 from db.models.activity import Activity
 from db.models.building import Building
-from db.models.organization import Organization
+from db.models.organization import Organization, organization_activity
+
+
+def organization_out_query():
+    """
+    Запрос строк в форме OrganizationOut: activity_ids собираются
+    в БД через array_agg, без загрузки ORM-объектов и связей.
+    Все списки организаций строятся на нём; к запросу можно добавлять
+    фильтры, JOIN и дополнительные колонки (add_columns).
+    """
+    activity_ids = (
+        select(func.array_agg(aggregate_order_by(
+            organization_activity.c.activity_id, organization_activity.c.activity_id)))
+        .where(organization_activity.c.organization_id == Organization.id)
+        .scalar_subquery()
+    )
+    return select(
+        Organization.id,
+        Organization.name,
+        Organization.inn,
+        Organization.phones,
+        Organization.building_id,
+        func.coalesce(activity_ids, literal_column("ARRAY[]::integer[]")).label("activity_ids"),
+    )
+
+
+@lru_cache(maxsize=None)
+def _search_statement(
+    name: bool, building_address: bool, activity_name: bool, after_id: bool, limit: bool
+):
+    """
+    Запрос поиска для набора заданных фильтров. Форм всего 32, каждая
+    собирается один раз; шаблоны ILIKE передаются параметрами :name,
+    :building_address и :activity_name.
+    """
+    stmt = organization_out_query()
+
+    if name:
+        stmt = stmt.where(Organization.name.ilike(bindparam("name")))
+    if building_address:
+        stmt = stmt.join(Organization.building).where(
+            Building.address.ilike(bindparam("building_address")))
+    if activity_name:
+        # EXISTS вместо JOIN: не размножает строки и не ломает LIMIT
+        stmt = stmt.where(Organization.activities.any(
+            Activity.name.ilike(bindparam("activity_name"))))
+
+    return keyset_bound(stmt, Organization.id, after_id, limit)
 
 
 async def search_organizations(
@@ -14,24 +63,82 @@ async def search_organizations(
     name: Optional[str] = None,
     building_address: Optional[str] = None,
     activity_name: Optional[str] = None,
-) -> List[Organization]:
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> List[Row]:
     """
     Поиск организаций по названию, адресу здания и имени активности.
     Все фильтры необязательны и могут комбинироваться.
     """
-    stmt = select(Organization).options(
-        joinedload(Organization.building),
-        joinedload(Organization.activities)
-    )
+    stmt = _search_statement(
+        bool(name), bool(building_address), bool(activity_name),
+        after_id is not None, limit is not None)
+    result = await db.execute(stmt, {
+        "name": f"%{name}%",
+        "building_address": f"%{building_address}%",
+        "activity_name": f"%{activity_name}%",
+        "after_id": after_id,
+        "limit": limit,
+    })
+    return result.all()
 
-    if name:
-        stmt = stmt.where(Organization.name.ilike(f"%{name}%"))
-    if building_address:
-        stmt = stmt.join(Organization.building).where(
-            Building.address.ilike(f"%{building_address}%"))
-    if activity_name:
-        stmt = stmt.join(Organization.activities).where(
-            Activity.name.ilike(f"%{activity_name}%"))
 
+async def suggest_organizations(
+    db: AsyncSession, q: str, limit: int = 10
+) -> List[Row]:
+    """
+    Подсказки по названию организации, ранжированные по релевантности.
+
+    Оба условия отбора (оператор pg_trgm «<%» и ILIKE) обслуживаются
+    GIN-индексом ix_organizations_name_trgm.
+    """
+    stmt = (
+        organization_out_query()
+        .where(or_(
+            literal(q).op("<%")(Organization.name),
+            Organization.name.icontains(q, autoescape=True),
+        ))
+        .order_by(
+            func.word_similarity(q, Organization.name).desc(),
+            func.similarity(q, Organization.name).desc(),
+            Organization.id,
+        )
+        .limit(limit)
+    )
     result = await db.execute(stmt)
-    return result.scalars().unique().all()
+    return result.all()
+
+
+@lru_cache(maxsize=None)
+def _by_phone_statement(after_id: bool, limit: bool):
+    stmt = organization_out_query().where(
+        Organization.phones_e164.contains(bindparam("phones")))
+    return keyset_bound(stmt, Organization.id, after_id, limit)
+
+
+async def get_organizations_by_phone(
+    db: AsyncSession,
+    phone: str,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> List[Row]:
+    """
+    Организации, у которых есть номер phone (уже в формате E.164).
+    Условие phones_e164 @> ARRAY[phone] обслуживается GIN-индексом.
+    """
+    stmt = _by_phone_statement(after_id is not None, limit is not None)
+    result = await db.execute(stmt, {"phones": [phone], "after_id": after_id, "limit": limit})
+    return result.all()
+
+
+async def stream_organizations(
+    db: AsyncSession, chunk_size: int
+) -> AsyncIterator[Sequence[Row]]:
+    """Все организации порциями по chunk_size через серверный курсор."""
+    result = await db.stream(
+        organization_out_query()
+        .order_by(Organization.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    async for chunk in result.partitions():
+        yield chunk
@@ -0,0 +1,72 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Sequence, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.activity import get_activities_by_ids
+from app.crud.building import get_buildings_by_ids
+from app.crud.organization import get_organizations_by_ids
+from db.session import read_sessionmaker
+
+T = TypeVar("T")
+
+
+class DataLoader(Generic[T]):
+    """
+    Склеивает одновременные загрузки по id в один запрос.
+
+    Все load() одного тика цикла событий копятся, а в следующем тике
+    выполняется один batch-запрос (WHERE id = ANY(...)) в собственной
+    сессии; результат раздаётся ожидающим. Одинаковые id в пачке
+    загружаются один раз. Отмена одного из ожидающих не отменяет пачку.
+    Загрузки с реплики и с primary (read_sessionmaker) копятся раздельно.
+    """
+
+    def __init__(self, batch: Callable[[AsyncSession, List[int]], Awaitable[Sequence[Any]]]):
+        self.batch = batch
+        self._pending: Dict[sessionmaker, Dict[int, asyncio.Future]] = {}
+        self._tasks: set = set()
+
+    async def load(self, key: int) -> Optional[T]:
+        session_factory = read_sessionmaker()
+        pending = self._pending.get(session_factory)
+        if pending is None:
+            pending = self._pending[session_factory] = {}
+            asyncio.get_running_loop().call_soon(self._dispatch, session_factory)
+        future = pending.get(key)
+        if future is None:
+            future = pending[key] = asyncio.get_running_loop().create_future()
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Sequence[int]) -> List[Optional[T]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self, session_factory: sessionmaker) -> None:
+        pending = self._pending.pop(session_factory)
+        task = asyncio.get_running_loop().create_task(self._run(session_factory, pending))
+        # Держим ссылку, чтобы задачу не собрал сборщик мусора
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self, session_factory: sessionmaker, pending: Dict[int, asyncio.Future]
+    ) -> None:
+        try:
+            async with session_factory() as db:
+                items = await self.batch(db, list(pending))
+        except Exception as exc:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        found = {item.id: item for item in items}
+        for key, future in pending.items():
+            if not future.done():
+                future.set_result(found.get(key))
+
+
+organization_loader = DataLoader(get_organizations_by_ids)
+building_loader = DataLoader(get_buildings_by_ids)
+activity_loader = DataLoader(get_activities_by_ids)
@@ -0,0 +1,106 @@
+from math import asin, cos, degrees, radians, sin, sqrt
+from typing import List, Tuple
+
+import numpy as np
+from sqlalchemy import func
+
+EARTH_RADIUS_KM = 6371.0  # Радиус Земли в км
+
+# (min_lat, max_lat, min_lon, max_lon)
+Area = Tuple[float, float, float, float]
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Расчет расстояния между двумя точками (км)."""
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = sin(dlat/2)**2 + cos(lat1)*cos(lat2)*sin(dlon/2)**2
+    c = 2 * asin(sqrt(a))
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_many(latitude: float, longitude: float, lats, lons) -> np.ndarray:
+    """
+    Векторизованный haversine: расстояния (км) от точки до массива точек
+    за один проход NumPy.
+    """
+    lat1 = np.radians(latitude)
+    lon1 = np.radians(longitude)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    lon2 = np.radians(np.asarray(lons, dtype=np.float64))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    # Ошибки округления могут дать sqrt(a) чуть больше 1
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(np.sqrt(a), 1.0))
+
+
+def within_radius(
+    latitude: float, longitude: float, lats, lons, radius_km: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Возвращает (маска попадания в радиус, расстояния в км)."""
+    distances = haversine_many(latitude, longitude, lats, lons)
+    return distances <= radius_km, distances
+
+
+def haversine_sql(lat_column, lon_column, latitude: float, longitude: float):
+    """SQL-выражение haversine: расстояние (км) от точки до координат в колонках."""
+    a = (
+        func.power(func.sin(func.radians(lat_column - latitude) / 2), 2)
+        + cos(radians(latitude)) * func.cos(func.radians(lat_column))
+        * func.power(func.sin(func.radians(lon_column - longitude) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * func.asin(func.least(func.sqrt(a), 1.0))
+
+
+def bounding_boxes(latitude: float, longitude: float, radius_km: float) -> List[Area]:
+    """
+    Прямоугольники, гарантированно покрывающие круг радиуса radius_km.
+
+    Если круг пересекает антимеридиан, возвращаются два прямоугольника,
+    если захватывает полюс — полоса по широте на всю долготу.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    min_lat = latitude - degrees(angular)
+    max_lat = latitude + degrees(angular)
+
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return [(max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0)]
+
+    dlon = degrees(asin(sin(angular) / cos(radians(latitude))))
+    min_lon = longitude - dlon
+    max_lon = longitude + dlon
+
+    if min_lon < -180.0:
+        return [
+            (min_lat, max_lat, min_lon + 360.0, 180.0),
+            (min_lat, max_lat, -180.0, max_lon),
+        ]
+    if max_lon > 180.0:
+        return [
+            (min_lat, max_lat, min_lon, 180.0),
+            (min_lat, max_lat, -180.0, max_lon - 360.0),
+        ]
+    return [(min_lat, max_lat, min_lon, max_lon)]
+
+
+# Сетка кластеров: ячеек на сторону тайла карты и максимум ячеек по оси
+CLUSTER_CELLS_PER_TILE = 8
+CLUSTER_MAX_CELLS_PER_AXIS = 32
+
+
+def cluster_cell_size(area: Area, zoom: int) -> float:
+    """
+    Размер ячейки сетки кластеров (градусы) для масштаба zoom.
+
+    Базовый размер — 1/CLUSTER_CELLS_PER_TILE тайла веб-карты. Если область
+    шире CLUSTER_MAX_CELLS_PER_AXIS ячеек, размер удваивается: число
+    кластеров в ответе ограничено, а сетка остаётся привязанной к (0, 0)
+    и не «плывёт» при сдвиге карты.
+    """
+    min_lat, max_lat, min_lon, max_lon = area
+    cell = 360.0 / 2 ** zoom / CLUSTER_CELLS_PER_TILE
+    span = max(max_lat - min_lat, max_lon - min_lon)
+    while span / cell > CLUSTER_MAX_CELLS_PER_AXIS:
+        cell *= 2
+    return cell
@@ -1,17 +1,54 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from api.activity import router as activity_router
 from api.building import router as building_router
+from api.bulk import router as bulk_router
+from api.changes import router as changes_router
 from api.organization import router as organization_router
+from app.metrics import metrics_middleware, render_metrics
+from app.warmup import warmup
+from db.session import primary_pin_middleware, replica_health
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the background warm-up and replica health checks."""
+    warmup.start()
+    replica_health.start()
+    yield
+    await replica_health.stop()
+    await warmup.stop()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.middleware("http")(primary_pin_middleware)
+app.middleware("http")(metrics_middleware)
 
 app.include_router(organization_router, prefix="/api", tags=["Organization"])
 app.include_router(building_router, prefix="/api", tags=["Building"])
 app.include_router(activity_router, prefix="/api", tags=["Activity"])
+app.include_router(bulk_router, prefix="/api", tags=["Import"])
+app.include_router(changes_router, prefix="/api", tags=["Changes"])
 
 
 @app.get("/")
 def read_root() -> dict[str, str]:
     """Health check endpoint."""
     return {"status": "ok"}
+
+
+@app.get("/ready")
+def read_ready() -> JSONResponse:
+    """Readiness endpoint: 503 until the startup warm-up has finished."""
+    if not warmup.ready:
+        return JSONResponse({"status": "warming up"}, status_code=503)
+    return JSONResponse({"status": "ready"})
+
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics() -> PlainTextResponse:
+    """Prometheus metrics endpoint."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
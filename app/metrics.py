@@ -0,0 +1,196 @@
+import re
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Gauge:
+    """Значение считывается функцией в момент выдачи метрик."""
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]):
+        self.name, self.help, self.read = name, help, read
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge",
+                f"{self.name} {self.read()}"]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        # Для каждого набора меток: счётчики по корзинам (+Inf последняя), сумма
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labels, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total[0]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+registry: List = []
+
+
+def register(metric):
+    registry.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    """Все метрики в текстовом формате Prometheus."""
+    return "\n".join(line for metric in registry for line in metric.render()) + "\n"
+
+
+REQUEST_LATENCY = register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"]))
+REQUEST_QUERIES = register(Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ["route"],
+    buckets=COUNT_BUCKETS))
+QUERY_LATENCY = register(Histogram(
+    "db_query_duration_seconds", "SQL statement latency", ["statement"]))
+POOL_WAIT = register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection"))
+SINGLEFLIGHT_CALLS = register(Counter(
+    "singleflight_calls_total",
+    "Single-flight calls: leader ran the query, coalesced awaited the leader",
+    ["function", "role"]))
+
+# Счётчик запросов к БД в рамках текущего HTTP-запроса
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar("request_queries", default=None)
+
+_STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+([\w.\"]+)", re.IGNORECASE)
+
+
+def statement_label(statement: str) -> str:
+    """Короткая метка SQL: операция и первая таблица, например «SELECT organizations»."""
+    words = statement.split(None, 1)
+    operation = words[0].upper() if words else "?"
+    match = _STATEMENT_TABLE.search(statement)
+    return f"{operation} {match.group(1).strip(chr(34))}" if match else operation
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, замеряющий ожидание свободного соединения."""
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.observe(perf_counter() - started)
+
+
+def instrument_engine(engine: AsyncEngine, prefix: str = "db") -> None:
+    """
+    Подписывается на события движка: латентность SQL и заполненность пула.
+    prefix различает метрики пулов разных движков (primary, реплика).
+    """
+    sync_engine = engine.sync_engine
+    pool = sync_engine.pool
+
+    # Время старта хранится в контексте выполнения, а не в conn.info:
+    # у упавшего запроса after_cursor_execute не вызывается, и метка
+    # осталась бы на соединении пула навсегда
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context.query_started = perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = context.query_started
+        QUERY_LATENCY.observe(perf_counter() - started, statement=statement_label(statement))
+        counter = _request_queries.get()
+        if counter is not None:
+            counter[0] += 1
+
+    register(Gauge(f"{prefix}_pool_size", "Configured pool size", pool.size))
+    register(Gauge(f"{prefix}_pool_checked_out", "Connections currently checked out",
+                   pool.checkedout))
+    register(Gauge(f"{prefix}_pool_overflow", "Connections opened above pool size",
+                   pool.overflow))
+
+
+def route_label(request: Request) -> str:
+    """
+    Шаблон пути маршрута вместе с префиксом роутера, например
+    «/api/organizations/by_phone/{number}». route.path у маршрутов из
+    include_router может не содержать префикса: он восстанавливается по
+    фактическому пути запроса.
+    """
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+    path = request.url.path
+    # Префикс — наименьшая часть пути из целых сегментов, после которой
+    # остаток совпадает с шаблоном маршрута
+    for index, char in enumerate(path):
+        if char == "/" and route.path_regex.match(path[index:]):
+            return path[:index] + route.path
+    return route.path
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Латентность и число SQL-запросов на каждый маршрут."""
+    counter = [0]
+    token = _request_queries.set(counter)
+    started = perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        _request_queries.reset(token)
+        path = route_label(request)
+        REQUEST_LATENCY.observe(perf_counter() - started,
+                                method=request.method, route=path, status=status)
+        REQUEST_QUERIES.observe(counter[0], route=path)
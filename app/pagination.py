@@ -0,0 +1,82 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import bindparam
+
+# Заголовок ответа с курсором следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(**values: Any) -> str:
+    """Упаковывает ключ последней записи страницы в непрозрачный курсор."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: Optional[str], **fields: Callable[[Any], Any]
+) -> Optional[Tuple[Any, ...]]:
+    """
+    Распаковывает курсор и возвращает значения полей в порядке fields,
+    приводя каждое к указанному типу. Для пустого курсора возвращает None.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        return tuple(cast(values[name]) for name, cast in fields.items())
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+@dataclass(frozen=True)
+class PageParams:
+    limit: int
+    after_id: Optional[int] = None
+
+
+def page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None),
+) -> PageParams:
+    """Зависимость: параметры keyset-пагинации по id."""
+    cursor = decode_cursor(after, id=int)
+    return PageParams(limit=limit, after_id=cursor[0] if cursor else None)
+
+
+def keyset(query, column, after_id: Optional[int] = None, limit: Optional[int] = None):
+    """Ограничивает запрос страницей после after_id в порядке column."""
+    if after_id is not None:
+        query = query.where(column > after_id)
+    query = query.order_by(column)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def keyset_bound(query, column, after_id: bool, limit: bool):
+    """
+    Как keyset, но для заранее собранных запросов: вместо значений в
+    запрос попадают параметры :after_id и :limit, которые передаются при
+    выполнении. Флаги задают только форму запроса.
+    """
+    if after_id:
+        query = query.where(column > bindparam("after_id"))
+    query = query.order_by(column)
+    if limit:
+        query = query.limit(bindparam("limit"))
+    return query
+
+
+def set_next_cursor(response: Response, items: Sequence[Any], page: PageParams) -> None:
+    """Полная страница — значит, дальше могут быть записи: отдаём курсор."""
+    if len(items) == page.limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(id=items[-1].id)
@@ -0,0 +1,77 @@
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Optional, Tuple, get_args, get_origin
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Row
+
+from app.config import settings
+
+
+def _load_orjson():
+    try:
+        import orjson
+    except ImportError as exc:
+        raise RuntimeError("Для FAST_JSON=true установите пакет orjson") from exc
+    return orjson
+
+
+_orjson = _load_orjson() if settings.fast_json else None
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+@lru_cache(maxsize=None)
+def _shape(response_type: Any) -> Optional[Tuple[bool, Tuple[str, ...], attrgetter]]:
+    """
+    (список ли это, поля модели по порядку, их getter) для Model и
+    List[Model]; None для остальных типов — они идут через Pydantic.
+    """
+    many = get_origin(response_type) is list
+    model = get_args(response_type)[0] if many else response_type
+    if not (isinstance(model, type) and issubclass(model, BaseModel)):
+        return None
+    fields = tuple(model.model_fields)
+    return many, fields, attrgetter(*fields)
+
+
+def json_bytes(response_type: Any, data: Any, fast: Optional[bool] = None) -> bytes:
+    """
+    data, приведённые к response_type, в JSON — так же, как FastAPI
+    сериализует response_model.
+
+    В быстром режиме (FAST_JSON=true) строки уже имеют форму схемы
+    (organization_out_query и т.п.), поэтому валидация пропускается:
+    атрибуты берутся в порядке полей модели и кодируются orjson.
+    Результат побайтно совпадает с Pydantic для плоских схем из schemas/.
+    """
+    if fast is None:
+        fast = _orjson is not None
+    shape = _shape(response_type) if fast else None
+    if shape is not None:
+        many, fields, getter = shape
+        items = data if many else [data]
+        # Строки запросов вида organization_out_query() уже идут в порядке
+        # полей схемы (лишние колонки в конце) — их можно читать как кортежи
+        if items and isinstance(items[0], Row) and items[0]._fields[:len(fields)] == fields:
+            shaped = [dict(zip(fields, item)) for item in items]
+        else:
+            shaped = [dict(zip(fields, getter(item))) for item in items]
+        data = shaped if many else shaped[0]
+        return (_orjson or _load_orjson()).dumps(data)
+
+    adapter = _adapter(response_type)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+def json_response(response_type: Any, data: Any) -> Response:
+    """
+    JSON-ответ с data, приведённым к response_type, в готовый Response
+    (например, для кэша). OpenAPI-схема по-прежнему берётся из
+    response_model эндпоинта.
+    """
+    return Response(content=json_bytes(response_type, data), media_type="application/json")
@@ -0,0 +1,73 @@
+import asyncio
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from app.metrics import SINGLEFLIGHT_CALLS
+from db.session import read_sessionmaker
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Одновременные вызовы с одинаковым ключом ждут один общий запрос.
+
+    Первый вызов (ведущий) запускает задачу в собственной сессии для
+    чтения (реплика или primary, см. read_sessionmaker), остальные
+    ждут её через asyncio.shield: отмена любого из ожидающих, включая
+    ведущего, не прерывает запрос для остальных. Ключ снимается, как только
+    задача завершилась, — результаты не кэшируются.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, call: Callable[..., Awaitable[T]]) -> T:
+        # Реплика и primary могут расходиться: их вызовы не склеиваются
+        session_factory = read_sessionmaker()
+        key = (session_factory, key)
+        task = self._inflight.get(key)
+        if task is None:
+            SINGLEFLIGHT_CALLS.inc(function=self.name, role="leader")
+            task = asyncio.get_running_loop().create_task(self._run(session_factory, call))
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._done, key))
+        else:
+            SINGLEFLIGHT_CALLS.inc(function=self.name, role="coalesced")
+        return await asyncio.shield(task)
+
+    async def _run(self, session_factory, call: Callable[..., Awaitable[T]]) -> T:
+        async with session_factory() as db:
+            return await call(db)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Если все ожидающие отменены, ошибку никто не заберёт — не шумим в лог
+        if not task.cancelled():
+            task.exception()
+
+
+def single_flight(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """
+    Декоратор для читающих CRUD-функций вида func(db, ...).
+
+    Ключ — аргументы после db, приведённые к единому виду (позиционные и
+    именованные, со значениями по умолчанию), поэтому f(db, 1) и
+    f(db, x=1) склеиваются. Переданная сессия не используется: запрос
+    выполняется в общей сессии ведущего, то есть видит только
+    закоммиченные данные. Аргументы должны быть хешируемыми.
+    """
+    signature = inspect.signature(func)
+    group = SingleFlight(func.__name__)
+
+    @functools.wraps(func)
+    async def wrapper(db, *args: Any, **kwargs: Any) -> T:
+        bound = signature.bind(db, *args, **kwargs)
+        bound.apply_defaults()
+        key: Tuple = tuple(bound.arguments.items())[1:]
+        return await group.do(key, lambda session: func(session, *args, **kwargs))
+
+    return wrapper
@@ -0,0 +1,188 @@
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from app.config import settings
+from app.geo import Area, bounding_boxes, within_radius
+
+# Формат файла: MAGIC, длина заголовка (uint64 LE), JSON-заголовок, затем
+# массивы numpy без сжатия, каждый выровнен на ARRAY_ALIGNMENT байт.
+# Заголовок хранит для каждого массива dtype, shape и смещение.
+MAGIC = b"ORGSNAP1"
+ARRAY_ALIGNMENT = 64
+
+
+class BuildingRecord(NamedTuple):
+    id: int
+    address: str
+    latitude: float
+    longitude: float
+
+
+class OrganizationRecord(NamedTuple):
+    id: int
+    name: str
+    inn: str
+    phones: str
+    building_id: int
+    activity_ids: List[int]
+    latitude: float
+    longitude: float
+
+
+def pack_strings(values: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Строки одной колонкой: байты UTF-8 подряд и смещения (n + 1)."""
+    encoded = [value.encode() for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return {"data": np.frombuffer(b"".join(encoded), dtype=np.uint8), "offsets": offsets}
+
+
+def write_snapshot(path: str, arrays: Dict[str, np.ndarray], meta: dict) -> None:
+    """
+    Записывает снимок во временный файл и атомарно подменяет path:
+    воркеры, уже отобразившие старый файл, дочитывают его без ошибок.
+    """
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        offset += -offset % ARRAY_ALIGNMENT
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+    header = json.dumps({**meta, "arrays": layout}).encode()
+    # Данные начинаются с выровненной позиции после заголовка
+    start = len(MAGIC) + 8 + len(header)
+    start += -start % ARRAY_ALIGNMENT
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(MAGIC)
+        file.write(len(header).to_bytes(8, "little"))
+        file.write(header)
+        for name, array in arrays.items():
+            file.seek(start + layout[name]["offset"])
+            file.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """
+    Снимок зданий и организаций только для чтения, отображённый в память
+    (np.memmap). Открытие читает лишь заголовок; страницы подгружаются ОС
+    по мере обращения и общие для всех воркеров через page cache.
+    Строится scripts.build_snapshot.
+    """
+
+    def __init__(self, path: str):
+        buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise RuntimeError(f"{path}: не файл снимка")
+        size = int.from_bytes(bytes(buffer[len(MAGIC):len(MAGIC) + 8]), "little")
+        header_end = len(MAGIC) + 8 + size
+        self.meta = json.loads(bytes(buffer[len(MAGIC) + 8:header_end]))
+        start = header_end + -header_end % ARRAY_ALIGNMENT
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, spec in self.meta.pop("arrays").items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"]))
+            offset = start + spec["offset"]
+            self.arrays[name] = (
+                buffer[offset:offset + count * dtype.itemsize].view(dtype).reshape(spec["shape"]))
+
+    def _string(self, column: str, row: int) -> str:
+        offsets = self.arrays[f"{column}_offsets"]
+        return bytes(self.arrays[f"{column}_data"][offsets[row]:offsets[row + 1]]).decode()
+
+    def _rows(self, ids_column: str, ids: Sequence[int]) -> np.ndarray:
+        """Номера строк для ids (по отсортированной колонке id); отсутствующие пропускаются."""
+        column = self.arrays[ids_column]
+        wanted = np.unique(np.asarray(ids, dtype=np.int64))
+        if not len(column) or not len(wanted):
+            return np.empty(0, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(column, wanted), len(column) - 1)
+        return rows[column[rows] == wanted]
+
+    def _building(self, row: int) -> BuildingRecord:
+        arrays = self.arrays
+        return BuildingRecord(
+            id=int(arrays["building_id"][row]),
+            address=self._string("building_address", row),
+            latitude=float(arrays["building_latitude"][row]),
+            longitude=float(arrays["building_longitude"][row]),
+        )
+
+    def _organization(self, row: int) -> OrganizationRecord:
+        arrays = self.arrays
+        links = arrays["organization_activity_offsets"]
+        building_row = int(arrays["organization_building_row"][row])
+        return OrganizationRecord(
+            id=int(arrays["organization_id"][row]),
+            name=self._string("organization_name", row),
+            inn=self._string("organization_inn", row),
+            phones=self._string("organization_phones", row),
+            building_id=int(arrays["building_id"][building_row]),
+            activity_ids=arrays["organization_activity_ids"][links[row]:links[row + 1]].tolist(),
+            latitude=float(arrays["building_latitude"][building_row]),
+            longitude=float(arrays["building_longitude"][building_row]),
+        )
+
+    def buildings(self, building_ids: Sequence[int]) -> List[BuildingRecord]:
+        return [self._building(row) for row in self._rows("building_id", building_ids)]
+
+    def organizations(self, organization_ids: Sequence[int]) -> List[OrganizationRecord]:
+        return [self._organization(row)
+                for row in self._rows("organization_id", organization_ids)]
+
+    def _in_areas(self, areas: Sequence[Area]) -> np.ndarray:
+        """Строки организаций, чьи здания попали хотя бы в одну из областей."""
+        latitudes = self.arrays["geo_latitude"]
+        longitudes = self.arrays["geo_longitude"]
+        found = []
+        for min_lat, max_lat, min_lon, max_lon in areas:
+            # geo_* отсортированы по широте: полоса широт — непрерывный срез
+            start = np.searchsorted(latitudes, min_lat, side="left")
+            stop = np.searchsorted(latitudes, max_lat, side="right")
+            inside = (longitudes[start:stop] >= min_lon) & (longitudes[start:stop] <= max_lon)
+            found.append(start + np.flatnonzero(inside))
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+
+    def organizations_by_geo(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: Optional[float] = None,
+        area: Optional[Area] = None,
+    ) -> List[OrganizationRecord]:
+        """То же, что get_organizations_by_geo, по снимку; результат в порядке id."""
+        if radius_km:
+            geo_rows = self._in_areas(bounding_boxes(latitude, longitude, radius_km))
+            mask, _ = within_radius(
+                latitude, longitude, self.arrays["geo_latitude"][geo_rows],
+                self.arrays["geo_longitude"][geo_rows], radius_km)
+            geo_rows = geo_rows[mask]
+        elif area:
+            geo_rows = self._in_areas([area])
+        else:
+            return []
+        rows = np.sort(self.arrays["geo_organization_row"][geo_rows])
+        return [self._organization(row) for row in rows]
+
+
+_snapshot: Optional[Snapshot] = None
+
+
+def get_snapshot() -> Optional[Snapshot]:
+    """
+    Снимок при DATA_SOURCE=snapshot, иначе None. Файл открывается при
+    первом обращении (прогрев при старте), а не при импорте: модуль нужен
+    и scripts.build_snapshot, который создаёт этот файл.
+    """
+    global _snapshot
+    if settings.data_source != "snapshot":
+        return None
+    if _snapshot is None:
+        if not settings.snapshot_path:
+            raise RuntimeError("Для DATA_SOURCE=snapshot укажите SNAPSHOT_PATH")
+        _snapshot = Snapshot(settings.snapshot_path)
+    return _snapshot
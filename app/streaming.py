@@ -0,0 +1,30 @@
+from typing import AsyncIterator, Callable, Sequence, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.responses import json_bytes
+from db.session import read_sessionmaker
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def ndjson_response(
+    producer: Callable[[AsyncSession], AsyncIterator[Sequence[object]]],
+    schema: Type[BaseModel],
+) -> StreamingResponse:
+    """
+    Потоковый ответ: по JSON-объекту schema на строку, порциями от producer.
+
+    Сессия открывается внутри генератора: зависимость get_read_db закрывается
+    до того, как начинается отправка тела ответа.
+    """
+    session_factory = read_sessionmaker()
+
+    async def body() -> AsyncIterator[bytes]:
+        async with session_factory() as db:
+            async for chunk in producer(db):
+                yield b"".join(json_bytes(schema, item) + b"\n" for item in chunk)
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
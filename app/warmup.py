@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from time import perf_counter
+from typing import List, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.activity_tree import load_activity_tree
+from app.config import settings
+from app.crud.activity import get_activities_by_ids, get_activity_by_id
+from app.crud.building import get_building_by_id, get_buildings_by_ids
+from app.crud.organization import (get_organization_by_id, get_organizations_by_building,
+                                   get_organizations_by_ids)
+from app.snapshot import get_snapshot
+from db.models.building import Building
+from db.session import AsyncSessionLocal, engine, read_engine
+
+logger = logging.getLogger(__name__)
+
+# Пауза перед повтором прогрева, если БД недоступна
+WARMUP_RETRY_SECONDS = 2.0
+
+
+async def _prime_connection(conn: AsyncConnection) -> None:
+    """
+    Пинг и по одному вызову горячих запросов по id: asyncpg готовит
+    выражения и загружает кодеки типов (в том числе массивов) для этого
+    соединения заранее, а не на первом запросе клиента.
+    """
+    await conn.execute(text("SELECT 1"))
+    async with AsyncSession(bind=conn) as db:
+        await get_organization_by_id(db, 0)
+        await get_organizations_by_ids(db, [])
+        await get_organizations_by_building(db, 0, limit=1)
+        await get_building_by_id(db, 0)
+        await get_buildings_by_ids(db, [])
+        await get_activity_by_id(db, 0)
+        await get_activities_by_ids(db, [])
+
+
+async def _warm_engine(target: AsyncEngine, connections: int) -> None:
+    """Открывает connections соединений пула одновременно и прогревает каждое."""
+    async with AsyncExitStack() as stack:
+        opened: List[AsyncConnection] = []
+        # Соединения держатся до конца, иначе пул отдал бы одно и то же
+        for _ in range(max(connections, 1)):
+            opened.append(await stack.enter_async_context(target.connect()))
+        await asyncio.gather(*(_prime_connection(conn) for conn in opened))
+        # Гео-запросы отбирают кандидатов по индексу (latitude, longitude):
+        # поднимаем его в буферный кэш Postgres агрегатом по index-only scan,
+        # строки в воркер не передаются. Без запрета seq scan планировщик
+        # выбрал бы полный проход по таблице
+        await opened[0].execute(text("SET LOCAL enable_seqscan = off"))
+        await opened[0].execute(
+            select(func.count()).select_from(Building)
+            .where(Building.latitude.between(-90.0, 90.0)))
+
+
+async def warm_up() -> None:
+    """Прогрев перед приёмом трафика: пул соединений, снимок дерева активностей."""
+    if get_snapshot() is not None:
+        # Узел со снимком может работать без БД: достаточно открыть файл;
+        # если его нет или он битый, прогрев повторяется, а /ready отвечает 503
+        return
+    connections = min(settings.warmup_connections, settings.db_pool_size)
+    for target in (engine, read_engine):
+        if target is not None:
+            await _warm_engine(target, connections)
+    async with AsyncSessionLocal() as db:
+        await load_activity_tree(db)
+
+
+class WarmUp:
+    """
+    Прогрев в фоне после старта приложения. Пока он не завершился,
+    /ready отвечает 503; при ошибке прогрев повторяется.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            started = perf_counter()
+            try:
+                await warm_up()
+            except Exception:
+                # Отмена в stop() посреди запроса может всплыть ошибкой
+                # закрытого соединения: это не повод повторять прогрев
+                if asyncio.current_task().cancelling():
+                    raise asyncio.CancelledError()
+                logger.warning("Warm-up failed, retrying", exc_info=True)
+                await asyncio.sleep(WARMUP_RETRY_SECONDS)
+                continue
+            logger.info("Warm-up finished in %.2fs", perf_counter() - started)
+            self.ready = True
+            return
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.ready = False
+
+
+warmup = WarmUp()
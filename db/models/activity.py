@@ -1,17 +1,94 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from typing import Optional, Sequence, Tuple
+
+from sqlalchemy import (BigInteger, Column, ForeignKey, Index, Integer, String,
+                        Table, column, event, select, values)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from db.base import Base
+from db.models.change_feed import ChangeTracked
+
+# Closure table: one row per (ancestor, descendant) pair, including self
+activity_closure = Table(
+    "activity_closure",
+    Base.metadata,
+    Column("ancestor_id", Integer, ForeignKey(
+        "activities.id"), primary_key=True),
+    Column("descendant_id", Integer, ForeignKey(
+        "activities.id"), primary_key=True, index=True),
+    Column("depth", Integer, nullable=False),  # 0 for the activity itself
+)
+
+# Single-row counter bumped on every activity insert; lets workers detect
+# that their in-process activity tree snapshot is stale
+activity_tree_version = Table(
+    "activity_tree_version",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", BigInteger, nullable=False),
+)
+
+# Number of distinct organizations linked to each activity or any of its
+# descendants; maintained by org_count_statement on link changes
+activity_org_counts = Table(
+    "activity_org_counts",
+    Base.metadata,
+    Column("activity_id", Integer, ForeignKey("activities.id"), primary_key=True),
+    Column("organization_count", Integer, nullable=False),
+)
 
 
-class Activity(Base):
+class Activity(ChangeTracked, Base):
     """Represents an activity (supports up to 3 levels of nesting)."""
     __tablename__ = "activities"
+    __table_args__ = (
+        # pg_trgm index: backs ILIKE '%term%' on name
+        Index("ix_activities_name_trgm", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}),
+        # Change feed keyset: (change_seq, id) > (:seq, :id)
+        Index("ix_activities_change_seq", "change_seq", "id"),
+    )
 
     id: int = Column(Integer, primary_key=True, index=True)
-    name: str = Column(String, nullable=False)
+    name: str = Column(String, nullable=False, index=True)
     parent_id: int | None = Column(
-        Integer, ForeignKey("activities.id"), nullable=True)
+        Integer, ForeignKey("activities.id"), nullable=True, index=True)
 
     parent: Mapped["Activity"] = relationship(
         "Activity", remote_side=[id], backref="children")
+
+
+def closure_statements(new_activities: Sequence[Tuple[int, Optional[int]]]) -> list:
+    """
+    Statements that register freshly inserted (id, parent_id) activities in
+    activity_closure and bump activity_tree_version. Parents must already
+    have their closure rows.
+    """
+    statements = [activity_closure.insert().values([
+        {"ancestor_id": activity_id, "descendant_id": activity_id, "depth": 0}
+        for activity_id, _ in new_activities
+    ])]
+    with_parent = [(activity_id, parent_id)
+                   for activity_id, parent_id in new_activities if parent_id is not None]
+    if with_parent:
+        new = values(
+            column("id", Integer), column("parent_id", Integer), name="new_activities"
+        ).data(with_parent)
+        statements.append(activity_closure.insert().from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(
+                activity_closure.c.ancestor_id,
+                new.c.id,
+                activity_closure.c.depth + 1,
+            ).join_from(activity_closure, new,
+                        activity_closure.c.descendant_id == new.c.parent_id),
+        ))
+    statements.append(activity_tree_version.update().values(
+        version=activity_tree_version.c.version + 1))
+    return statements
+
+
+@event.listens_for(Activity, "after_insert")
+def _insert_closure_rows(mapper, connection, target: Activity) -> None:
+    """Keep activity_closure and activity_tree_version in sync for every inserted activity."""
+    for statement in closure_statements([(target.id, target.parent_id)]):
+        connection.execute(statement)
@@ -1,11 +1,21 @@
-from sqlalchemy import Column, Float, Integer, String
+from sqlalchemy import Column, Float, Index, Integer, String
 
 from db.base import Base
+from db.models.change_feed import ChangeTracked
 
 
-class Building(Base):
+class Building(ChangeTracked, Base):
     """Represents a building with address and coordinates."""
     __tablename__ = "buildings"
+    __table_args__ = (
+        # Bounding-box prefilter for geo queries
+        Index("ix_buildings_latitude_longitude", "latitude", "longitude"),
+        # Change feed keyset: (change_seq, id) > (:seq, :id)
+        Index("ix_buildings_change_seq", "change_seq", "id"),
+        # pg_trgm index: backs ILIKE '%term%' on address
+        Index("ix_buildings_address_trgm", "address", postgresql_using="gin",
+              postgresql_ops={"address": "gin_trgm_ops"}),
+    )
 
     id: int = Column(Integer, primary_key=True, index=True)
     address: str = Column(String, nullable=False)
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, Table, event, func
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from db.base import Base
+
+# Single-row counter behind change_seq. A writing transaction bumps it once
+# and stamps the value on every row it inserts or updates; the row lock is
+# held until commit, so values become visible strictly in increasing order
+# and a client that has synced up to N never misses a later commit below N.
+change_sequence = Table(
+    "change_sequence",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("value", BigInteger, nullable=False),
+)
+
+# Deleted rows of change-tracked tables, so that mirrors can drop them
+tombstones = Table(
+    "tombstones",
+    Base.metadata,
+    Column("id", BigInteger, primary_key=True),
+    Column("entity", String, nullable=False),  # table name of the deleted row
+    Column("entity_id", Integer, nullable=False),
+    Column("change_seq", BigInteger, nullable=False),
+    Column("deleted_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Index("ix_tombstones_change_seq", "change_seq", "id"),
+)
+
+
+class ChangeTracked:
+    """
+    Mixin for tables exposed through the change feed. change_seq is set by
+    the before_flush hook below; Core inserts must pass change_seq(session).
+    Each table declares an ix_<table>_change_seq index on (change_seq, id).
+    """
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    change_seq: Mapped[int] = mapped_column(BigInteger)
+
+
+def change_seq(session: Session) -> int:
+    """The change_seq of the session's current transaction, taken on first use."""
+    transaction = session.get_transaction()
+    taken = session.info.get("change_seq")
+    if taken is None or taken[0] is not transaction:
+        value = session.connection().execute(
+            change_sequence.update()
+            .values(value=change_sequence.c.value + 1)
+            .returning(change_sequence.c.value)
+        ).scalar_one()
+        taken = session.info["change_seq"] = (transaction, value)
+    return taken[1]
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_changes(session: Session, flush_context, instances) -> None:
+    """Stamp change_seq on new and modified rows and record tombstones for deleted ones."""
+    changed = [
+        instance for instance in session.new
+        if isinstance(instance, ChangeTracked)
+    ] + [
+        instance for instance in session.dirty
+        if isinstance(instance, ChangeTracked) and session.is_modified(instance)
+    ]
+    deleted = [instance for instance in session.deleted if isinstance(instance, ChangeTracked)]
+    if not changed and not deleted:
+        return
+
+    seq = change_seq(session)
+    for instance in changed:
+        instance.change_seq = seq
+    if deleted:
+        session.connection().execute(tombstones.insert(), [
+            {"entity": instance.__tablename__, "entity_id": instance.id, "change_seq": seq}
+            for instance in deleted
+        ])
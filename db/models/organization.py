@@ -1,7 +1,14 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Table
-from sqlalchemy.orm import Mapped, relationship
+from typing import Sequence
+
+from sqlalchemy import (Column, ForeignKey, Index, Integer, String, Table, any_, func,
+                        literal, select, text)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import Mapped, relationship, validates
 
 from db.base import Base
+from db.models.activity import activity_closure, activity_org_counts
+from db.models.change_feed import ChangeTracked
+from db.phones import normalize_phones
 
 # Association table for many-to-many relationship
 organization_activity = Table(
@@ -9,22 +16,68 @@ organization_activity = Table(
     Base.metadata,
     Column("organization_id", Integer, ForeignKey(
         "organizations.id"), primary_key=True),
+    # The primary key covers lookups by organization_id only
     Column("activity_id", Integer, ForeignKey(
-        "activities.id"), primary_key=True),
+        "activities.id"), primary_key=True, index=True),
 )
 
 
-class Organization(Base):
+def org_count_statement(organization_ids: Sequence[int], delta: int = 1):
+    """
+    Upsert that adds delta to activity_org_counts for every activity that
+    the given organizations' current links reach through activity_closure.
+    Run with delta=1 after links are inserted and delta=-1 before they are
+    removed; an organization counts once per ancestor however many of its
+    activities fall under it.
+    """
+    reached = (
+        select(
+            activity_closure.c.ancestor_id,
+            func.count(organization_activity.c.organization_id.distinct()) * delta,
+        )
+        .join_from(organization_activity, activity_closure,
+                   activity_closure.c.descendant_id == organization_activity.c.activity_id)
+        .where(organization_activity.c.organization_id == any_(
+            literal(list(organization_ids), ARRAY(Integer))))
+        .group_by(activity_closure.c.ancestor_id)
+    )
+    statement = insert(activity_org_counts).from_select(
+        ["activity_id", "organization_count"], reached)
+    return statement.on_conflict_do_update(
+        index_elements=[activity_org_counts.c.activity_id],
+        set_={"organization_count": activity_org_counts.c.organization_count
+              + statement.excluded.organization_count},
+    )
+
+
+class Organization(ChangeTracked, Base):
     """Represents an organization with phones, building, and activities."""
     __tablename__ = "organizations"
+    __table_args__ = (
+        # pg_trgm index: backs ILIKE '%term%' and similarity search
+        Index("ix_organizations_name_trgm", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}),
+        # Reverse phone lookup: phones_e164 @> ARRAY['+7...']
+        Index("ix_organizations_phones_e164", "phones_e164", postgresql_using="gin"),
+        # Change feed keyset: (change_seq, id) > (:seq, :id)
+        Index("ix_organizations_change_seq", "change_seq", "id"),
+    )
 
     id: int = Column(Integer, primary_key=True, index=True)
     inn: str = Column(String, nullable=False)
     name: str = Column(String, nullable=False)
     phones: str = Column(String, nullable=False)  # Comma-separated numbers
+    # Normalized copy of phones, kept in sync by the validator below
+    phones_e164: list[str] = Column(
+        ARRAY(String), nullable=False, server_default=text("'{}'"))
     building_id: int = Column(
-        Integer, ForeignKey("buildings.id"), nullable=False)
+        Integer, ForeignKey("buildings.id"), nullable=False, index=True)
 
     building: Mapped["Building"] = relationship("Building")
     activities: Mapped[list["Activity"]] = relationship(
         "Activity", secondary=organization_activity, backref="organizations")
+
+    @validates("phones")
+    def _sync_phones_e164(self, key, phones):
+        self.phones_e164 = normalize_phones(phones)
+        return phones
@@ -0,0 +1,39 @@
+import re
+from typing import List, Optional
+
+# Separators between numbers in Organization.phones
+_SEPARATORS = re.compile(r"[,;]")
+_NON_DIGITS = re.compile(r"\D")
+
+DEFAULT_COUNTRY_CODE = "7"
+
+
+def normalize_phone(raw: str) -> Optional[str]:
+    """
+    The number in E.164 format ("+79001234567"), or None if it has no digits.
+
+    A number starting with "+" is international and kept as is. Otherwise
+    Russian rules apply: 11 digits with a leading 8 mean +7, and 10 digits
+    are a number without the country code.
+    The same rules are duplicated in SQL in migration c9a131faf9c7.
+    """
+    digits = _NON_DIGITS.sub("", raw)
+    if not digits:
+        return None
+    if raw.strip().startswith("+"):
+        return "+" + digits
+    if len(digits) == 11 and digits[0] == "8":
+        return "+" + DEFAULT_COUNTRY_CODE + digits[1:]
+    if len(digits) == 10:
+        return "+" + DEFAULT_COUNTRY_CODE + digits
+    return "+" + digits
+
+
+def normalize_phones(phones: str) -> List[str]:
+    """Normalized numbers from a comma-separated string, without blanks or repeats."""
+    result: List[str] = []
+    for part in _SEPARATORS.split(phones):
+        phone = normalize_phone(part)
+        if phone is not None and phone not in result:
+            result.append(phone)
+    return result
@@ -1,16 +1,136 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
+from app.metrics import InstrumentedQueuePool, instrument_engine
+
+logger = logging.getLogger(__name__)
+
+# Cookie that pins a client's reads to the primary right after it wrote
+PRIMARY_PIN_COOKIE = "primary_pin"
+
 
-engine = create_async_engine(settings.db_url, echo=True)
+def _create_engine(url: str, metrics_prefix: str) -> AsyncEngine:
+    new_engine = create_async_engine(
+        url,
+        echo=settings.db_echo,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        query_cache_size=settings.db_query_cache_size,
+        connect_args={"prepared_statement_cache_size": settings.db_statement_cache_size},
+    )
+    instrument_engine(new_engine, metrics_prefix)
+    return new_engine
+
+
+engine = _create_engine(settings.db_url, "db")
+# Read replica; without DB_READ_URL every read goes to the primary
+read_engine: Optional[AsyncEngine] = (
+    _create_engine(settings.db_read_url, "db_read") if settings.db_read_url else None
+)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
+ReadSessionLocal = sessionmaker(
+    bind=read_engine, class_=AsyncSession, expire_on_commit=False
+) if read_engine is not None else None
+
+# Set per request from the pin cookie by primary_pin_middleware
+_pinned_to_primary: ContextVar[bool] = ContextVar("pinned_to_primary", default=False)
+
+
+class ReplicaHealth:
+    """
+    Periodically pings the replica and checks its replication lag.
+    While the replica is unhealthy, reads fall back to the primary.
+    """
+
+    def __init__(self):
+        self.healthy = True
+        self._task: Optional[asyncio.Task] = None
+
+    async def check(self) -> bool:
+        try:
+            async with read_engine.connect() as conn:
+                lag = await asyncio.wait_for(conn.scalar(text(
+                    "SELECT COALESCE(EXTRACT(EPOCH FROM "
+                    "now() - pg_last_xact_replay_timestamp()), 0)"
+                )), timeout=settings.replica_check_interval)
+            healthy = float(lag) <= settings.replica_max_lag
+        except Exception:
+            logger.debug("Replica health check failed", exc_info=True)
+            healthy = False
+        if healthy != self.healthy:
+            logger.warning("Replica is now %s", "healthy" if healthy else "unhealthy")
+        self.healthy = healthy
+        return healthy
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(settings.replica_check_interval)
 
+    def start(self) -> None:
+        if read_engine is not None and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
 
-async def get_db() -> AsyncSession:
-    """Dependency for getting DB session."""
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+replica_health = ReplicaHealth()
+
+
+def reads_from_replica() -> bool:
+    """Whether reads of the current request go to the replica."""
+    return (ReadSessionLocal is not None and replica_health.healthy
+            and not _pinned_to_primary.get())
+
+
+def read_sessionmaker() -> sessionmaker:
+    """Session factory for reads: the replica unless it is down or the client is pinned."""
+    return ReadSessionLocal if reads_from_replica() else AsyncSessionLocal
+
+
+async def primary_pin_middleware(request: Request, call_next):
+    """Routes the reads of a client that has just written to the primary."""
+    token = _pinned_to_primary.set(PRIMARY_PIN_COOKIE in request.cookies)
+    try:
+        return await call_next(request)
+    finally:
+        _pinned_to_primary.reset(token)
+
+
+async def get_db(response: Response) -> AsyncSession:
+    """Dependency for getting a primary DB session (writes)."""
     async with AsyncSessionLocal() as session:
+        if read_engine is not None:
+            # Give the replica time to catch up before this client reads from it again
+            @event.listens_for(session.sync_session, "after_commit")
+            def _pin_to_primary(_session):
+                response.set_cookie(
+                    PRIMARY_PIN_COOKIE, "1",
+                    max_age=max(int(settings.primary_pin_seconds), 1), httponly=True)
+        yield session
+
+
+async def get_read_db() -> AsyncSession:
+    """Dependency for getting a DB session for GET routes (replica when available)."""
+    async with read_sessionmaker()() as session:
         yield session
@@ -16,3 +16,7 @@ class ActivityOut(BaseModel):
     model_config = {
         "from_attributes": True
     }
+
+
+class ActivityOrgCountOut(ActivityOut):
+    organization_count: int  # организации в поддереве, каждая один раз
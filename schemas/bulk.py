@@ -0,0 +1,43 @@
+from typing import Annotated, List, Literal, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from schemas.activity import ActivityCreate
+from schemas.building import BuildingCreate
+
+
+class BuildingImport(BuildingCreate):
+    type: Literal["building"]
+    # Ключ, по которому на здание ссылаются записи того же импорта
+    ref: Optional[str] = None
+
+
+class ActivityImport(ActivityCreate):
+    type: Literal["activity"]
+    ref: Optional[str] = None
+    parent_ref: Optional[str] = None
+
+
+class OrganizationImport(BaseModel):
+    type: Literal["organization"]
+    name: str
+    inn: str
+    phones: str
+    building_id: Optional[int] = None
+    building_ref: Optional[str] = None
+    activity_ids: List[int] = []
+    activity_refs: List[str] = []
+
+
+ImportRecord = Annotated[
+    Union[BuildingImport, ActivityImport, OrganizationImport],
+    Field(discriminator="type"),
+]
+
+
+class ImportReport(BaseModel):
+    buildings: int = 0
+    activities: int = 0
+    organizations: int = 0
+    seconds: float = 0.0
+    rows_per_second: float = 0.0
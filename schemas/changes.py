@@ -0,0 +1,27 @@
+from typing import List
+
+from pydantic import BaseModel
+
+from schemas.activity import ActivityOut
+from schemas.building import BuildingOut
+from schemas.organization import OrganizationOut
+
+
+class DeletedOut(BaseModel):
+    entity: str  # organizations, buildings или activities
+    id: int
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class ChangesOut(BaseModel):
+    organizations: List[OrganizationOut]
+    buildings: List[BuildingOut]
+    activities: List[ActivityOut]
+    deleted: List[DeletedOut]
+    # Передаётся как since в следующем запросе
+    next_token: str
+    # true — изменений больше limit, следующую страницу можно запросить сразу
+    has_more: bool
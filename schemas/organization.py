@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -22,3 +22,18 @@ class OrganizationOut(BaseModel):
     model_config = {
         "from_attributes": True
     }
+
+
+class OrganizationNearOut(OrganizationOut):
+    distance_km: float
+
+
+class OrganizationClusterOut(BaseModel):
+    latitude: float  # центроид организаций ячейки
+    longitude: float
+    count: int
+    organization_id: Optional[int] = None  # только для ячейки с одной организацией
+
+    model_config = {
+        "from_attributes": True
+    }
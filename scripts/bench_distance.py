@@ -0,0 +1,52 @@
+"""
+Микро-бенчмарк: скалярный haversine против векторизованного haversine_many.
+
+Запуск: python -m scripts.bench_distance
+"""
+import time
+
+import numpy as np
+
+from app.geo import haversine, within_radius
+
+SIZES = (1_000, 100_000, 1_000_000)
+ORIGIN = (55.7558, 37.6176)
+RADIUS_KM = 10.0
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    rng = np.random.default_rng(42)
+    print(f"{'points':>10} {'scalar, ms':>12} {'numpy, ms':>12} {'speedup':>9}")
+    for size in SIZES:
+        lats = rng.normal(ORIGIN[0], 0.2, size)
+        lons = rng.normal(ORIGIN[1], 0.3, size)
+        lat_list, lon_list = lats.tolist(), lons.tolist()
+        repeat = 3 if size < 1_000_000 else 1
+
+        def scalar():
+            return [
+                haversine(ORIGIN[0], ORIGIN[1], lat, lon) <= RADIUS_KM
+                for lat, lon in zip(lat_list, lon_list)
+            ]
+
+        def vectorized():
+            return within_radius(ORIGIN[0], ORIGIN[1], lats, lons, RADIUS_KM)
+
+        assert scalar() == vectorized()[0].tolist()
+        scalar_s = _best_of(scalar, repeat)
+        numpy_s = _best_of(vectorized, repeat)
+        print(f"{size:>10} {scalar_s * 1000:>12.2f} {numpy_s * 1000:>12.2f} "
+              f"{scalar_s / numpy_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Бенчмарк сериализации списков: Pydantic (по умолчанию) против FAST_JSON.
+
+Строки берутся из БД теми же запросами, что и в эндпоинтах
+(organization_out_query, get_all_buildings), и кодируются обоими
+путями app.responses.json_bytes. Для каждого размера проверяется, что
+результат побайтно совпадает.
+
+Запуск: python -m scripts.bench_serialization --sizes 100 1000 10000
+"""
+import argparse
+import asyncio
+from time import perf_counter
+from typing import Any, List
+
+from app.crud.building import get_all_buildings
+from app.crud.organization_crud import organization_out_query
+from app.responses import json_bytes
+from db.models.organization import Organization
+from db.session import AsyncSessionLocal
+from schemas.building import BuildingOut
+from schemas.organization import OrganizationOut
+
+
+def timed(fn, repeat: int) -> float:
+    """Лучшее из repeat время одного вызова, мс."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = perf_counter()
+        fn()
+        best = min(best, perf_counter() - started)
+    return best * 1000
+
+
+def compare(label: str, response_type: Any, rows: List[Any], repeat: int) -> None:
+    slow = json_bytes(response_type, rows, fast=False)
+    fast = json_bytes(response_type, rows, fast=True)
+    if slow != fast:
+        raise SystemExit(f"{label}: вывод быстрого пути отличается от Pydantic")
+
+    slow_ms = timed(lambda: json_bytes(response_type, rows, fast=False), repeat)
+    fast_ms = timed(lambda: json_bytes(response_type, rows, fast=True), repeat)
+    print(f"{label:<28} {len(rows):>8} {len(slow) / 1024:>9.0f} "
+          f"{slow_ms:>10.2f} {fast_ms:>10.2f} {slow_ms / fast_ms:>7.1f}x")
+
+
+async def fetch(size: int):
+    async with AsyncSessionLocal() as db:
+        organizations = (await db.execute(
+            organization_out_query().order_by(Organization.id).limit(size))).all()
+        buildings = await get_all_buildings(db, limit=size)
+    return organizations, buildings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    organizations, buildings = asyncio.run(fetch(max(args.sizes)))
+    print(f"{'payload':<28} {'rows':>8} {'KiB':>9} {'pydantic':>10} {'fast':>10} {'speedup':>8}")
+    for size in args.sizes:
+        compare("List[OrganizationOut]", List[OrganizationOut], organizations[:size], args.repeat)
+        compare("List[BuildingOut]", List[BuildingOut], buildings[:size], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
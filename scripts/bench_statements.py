@@ -0,0 +1,163 @@
+"""
+Накладные расходы на один запрос: select(), собираемый на каждый вызов,
+против запросов, собранных заранее, при разных настройках кэшей.
+
+Одни и те же выборки (организация по id, пачка по id, поиск по названию)
+выполняются последовательно в одной сессии. «plain» собирает select()
+заново на каждый вызов, как было раньше; «lambda» — то же через
+lambda_stmt (для сравнения: ORM клонирует такой запрос при каждом
+выполнении); «cached» — CRUD-функции из app.crud с заранее собранными
+запросами и bindparam. Каждый вариант прогоняется на трёх engine: без
+кэшей, только с кэшем компиляции SQLAlchemy (DB_QUERY_CACHE_SIZE) и
+вместе с кэшем подготовленных выражений asyncpg (DB_STATEMENT_CACHE_SIZE).
+Печатается медиана времени вызова, мкс.
+
+Запуск: python -m scripts.bench_statements --calls 2000
+"""
+import argparse
+import asyncio
+import random
+from statistics import median
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from sqlalchemy import Integer, any_, func, lambda_stmt, literal, select, type_coerce
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import settings
+from app.crud.organization import get_organization_by_id, get_organizations_by_ids
+from app.crud.organization_crud import organization_out_query, search_organizations
+from db.models.organization import Organization
+
+# (название, DB_QUERY_CACHE_SIZE, DB_STATEMENT_CACHE_SIZE)
+CONFIGS: List[Tuple[str, int, int]] = [
+    ("без кэшей", 0, 0),
+    ("компиляция", settings.db_query_cache_size, 0),
+    ("+ asyncpg", settings.db_query_cache_size, settings.db_statement_cache_size),
+]
+
+Call = Callable[[AsyncSession, random.Random], Awaitable[object]]
+
+
+async def plain_by_id(db: AsyncSession, ids: List[int], rng: random.Random):
+    query = organization_out_query().filter(Organization.id == rng.choice(ids))
+    return (await db.execute(query)).one_or_none()
+
+
+async def plain_by_ids(db: AsyncSession, ids: List[int], rng: random.Random):
+    query = organization_out_query().where(
+        Organization.id == any_(literal(rng.sample(ids, 10), ARRAY(Integer))))
+    return (await db.execute(query)).all()
+
+
+async def plain_search(db: AsyncSession, names: List[str], rng: random.Random):
+    query = (
+        organization_out_query()
+        .where(Organization.name.ilike(f"%{rng.choice(names)}%"))
+        .order_by(Organization.id)
+        .limit(20)
+    )
+    return (await db.execute(query)).all()
+
+
+async def lambda_by_id(db: AsyncSession, ids: List[int], rng: random.Random):
+    org_id = rng.choice(ids)
+    query = lambda_stmt(lambda: organization_out_query().where(Organization.id == org_id))
+    return (await db.execute(query)).one_or_none()
+
+
+async def lambda_by_ids(db: AsyncSession, ids: List[int], rng: random.Random):
+    org_ids = rng.sample(ids, 10)
+    query = lambda_stmt(lambda: organization_out_query().where(
+        Organization.id == any_(type_coerce(org_ids, ARRAY(Integer)))))
+    return (await db.execute(query)).all()
+
+
+async def lambda_search(db: AsyncSession, names: List[str], rng: random.Random):
+    pattern = f"%{rng.choice(names)}%"
+    query = lambda_stmt(lambda: organization_out_query())
+    query += lambda s: s.where(Organization.name.ilike(pattern))
+    query += lambda s: s.order_by(Organization.id).limit(20)
+    return (await db.execute(query)).all()
+
+
+def cases(ids: List[int], names: List[str]) -> Dict[str, Dict[str, Call]]:
+    return {
+        "по id": {
+            "plain": lambda db, rng: plain_by_id(db, ids, rng),
+            "lambda": lambda db, rng: lambda_by_id(db, ids, rng),
+            "cached": lambda db, rng: get_organization_by_id(db, rng.choice(ids)),
+        },
+        "пачка из 10 id": {
+            "plain": lambda db, rng: plain_by_ids(db, ids, rng),
+            "lambda": lambda db, rng: lambda_by_ids(db, ids, rng),
+            "cached": lambda db, rng: get_organizations_by_ids(db, rng.sample(ids, 10)),
+        },
+        "поиск по названию": {
+            "plain": lambda db, rng: plain_search(db, names, rng),
+            "lambda": lambda db, rng: lambda_search(db, names, rng),
+            "cached": lambda db, rng: search_organizations(
+                db, name=rng.choice(names), limit=20),
+        },
+    }
+
+
+async def sample(size: int = 500) -> Tuple[List[int], List[str]]:
+    engine = create_async_engine(settings.db_url)
+    async with AsyncSession(engine) as db:
+        rows = (await db.execute(
+            select(Organization.id, Organization.name)
+            .order_by(func.random()).limit(size))).all()
+    await engine.dispose()
+    # Подстрока названия, чтобы поиск что-то находил
+    return [row.id for row in rows], [row.name[:4] for row in rows]
+
+
+async def measure(call: Call, query_cache_size: int, statement_cache_size: int,
+                  calls: int, seed: int) -> float:
+    """Медиана времени одного вызова, мкс, на свежем engine с одним соединением."""
+    engine = create_async_engine(
+        settings.db_url,
+        pool_size=1,
+        query_cache_size=query_cache_size,
+        connect_args={"prepared_statement_cache_size": statement_cache_size},
+    )
+    rng = random.Random(seed)
+    timings = []
+    try:
+        async with AsyncSession(engine) as db:
+            for _ in range(max(calls // 10, 10)):  # прогрев: соединение и кэши
+                await call(db, rng)
+            for _ in range(calls):
+                started = perf_counter()
+                await call(db, rng)
+                timings.append(perf_counter() - started)
+    finally:
+        await engine.dispose()
+    return median(timings) * 1e6
+
+
+async def run(calls: int, seed: int) -> None:
+    ids, names = await sample()
+    header = "".join(f"{name:>14}" for name, _, _ in CONFIGS)
+    print(f"{'запрос':<20} {'вариант':<8}{header}")
+    for label, variants in cases(ids, names).items():
+        for variant, call in variants.items():
+            results = [
+                await measure(call, query_cache_size, statement_cache_size, calls, seed)
+                for _, query_cache_size, statement_cache_size in CONFIGS
+            ]
+            print(f"{label:<20} {variant:<8}" + "".join(f"{us:>14.0f}" for us in results))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(run(args.calls, args.seed))
+
+
+if __name__ == "__main__":
+    main()
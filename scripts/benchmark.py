@@ -0,0 +1,215 @@
+"""
+Нагрузочный прогон всех эндпоинтов API через ASGI-клиент.
+
+Приложение работает в том же процессе (httpx.ASGITransport) против БД из
+DB_URL, например локального Postgres из docker-compose, заполненного
+scripts.generate_data. Для каждого эндпоинта печатаются p50/p95/p99 и
+пропускная способность. Результат сохраняется в JSON (--out), с которым
+можно сравнить следующий прогон (--compare). Чтобы мерить запросы к БД,
+а не кэш ответов, запускайте с CACHE_TTL=0.
+
+Запуск: python -m scripts.benchmark --requests 200 --concurrency 16 --out base.json
+        python -m scripts.benchmark --compare base.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import func, select
+
+from app.main import app
+from db.models.activity import Activity
+from db.models.building import Building
+from db.models.organization import Organization
+from db.session import AsyncSessionLocal
+
+# (имя, метод, функция rng -> (url, json-тело))
+Scenario = Tuple[str, str, Callable[[random.Random], Tuple[str, Optional[dict]]]]
+
+
+async def sample_data(size: int = 200) -> Dict[str, list]:
+    """Случайные существующие id и имена для подстановки в запросы."""
+    async with AsyncSessionLocal() as db:
+        async def pick(column):
+            result = await db.execute(select(column).order_by(func.random()).limit(size))
+            return result.scalars().all()
+
+        buildings = (await db.execute(
+            select(Building.latitude, Building.longitude).order_by(func.random()).limit(size)
+        )).all()
+        return {
+            "building_ids": await pick(Building.id),
+            "organization_ids": await pick(Organization.id),
+            "activity_ids": await pick(Activity.id),
+            "activity_names": await pick(Activity.name),
+            "root_activity_names": (await db.execute(
+                select(Activity.name).where(Activity.parent_id.is_(None)).limit(size)
+            )).scalars().all(),
+            "points": [tuple(row) for row in buildings],
+            "names": [name.split()[0][:4] for name in await pick(Organization.name)],
+        }
+
+
+def scenarios(data: Dict[str, list], writes: bool) -> List[Scenario]:
+    def point(rng):
+        lat, lon = rng.choice(data["points"])
+        return lat, lon
+
+    def by_geo_radius(rng):
+        lat, lon = point(rng)
+        return f"/api/organizations/by_geo?latitude={lat}&longitude={lon}&radius_km=1", None
+
+    def by_geo_area(rng):
+        lat, lon = point(rng)
+        return (f"/api/organizations/by_geo?latitude={lat}&longitude={lon}"
+                f"&min_lat={lat - 0.01}&max_lat={lat + 0.01}"
+                f"&min_lon={lon - 0.02}&max_lon={lon + 0.02}"), None
+
+    def nearest(rng):
+        lat, lon = point(rng)
+        return f"/api/organizations/nearest?latitude={lat}&longitude={lon}&limit=20", None
+
+    items = [
+        ("GET /buildings/{id}", "GET",
+         lambda rng: (f"/api/buildings/{rng.choice(data['building_ids'])}", None)),
+        ("GET /buildings/", "GET", lambda rng: ("/api/buildings/", None)),
+        ("GET /activities/{id}", "GET",
+         lambda rng: (f"/api/activities/{rng.choice(data['activity_ids'])}", None)),
+        ("GET /activities/", "GET", lambda rng: ("/api/activities/", None)),
+        ("GET /organizations/{id}", "GET",
+         lambda rng: (f"/api/organizations/{rng.choice(data['organization_ids'])}", None)),
+        ("GET /organizations/search", "GET",
+         lambda rng: (f"/api/organizations/search?name={rng.choice(data['names'])}", None)),
+        ("GET /organizations/suggest", "GET",
+         lambda rng: (f"/api/organizations/suggest?q={rng.choice(data['names'])}", None)),
+        ("GET /organizations/by_building/{id}", "GET",
+         lambda rng: (f"/api/organizations/by_building/{rng.choice(data['building_ids'])}", None)),
+        ("GET /organizations/by_activity/{name}", "GET",
+         lambda rng: (f"/api/organizations/by_activity/{rng.choice(data['activity_names'])}", None)),
+        ("GET /organizations/by_activity_tree/{name}", "GET",
+         lambda rng: (f"/api/organizations/by_activity_tree/"
+                      f"{rng.choice(data['root_activity_names'])}", None)),
+        ("GET /organizations/by_geo (radius)", "GET", by_geo_radius),
+        ("GET /organizations/by_geo (area)", "GET", by_geo_area),
+        ("GET /organizations/nearest", "GET", nearest),
+    ]
+    if writes:
+        items += [
+            ("POST /buildings/", "POST", lambda rng: ("/api/buildings/", {
+                "address": "Бенчмарк", "latitude": point(rng)[0], "longitude": point(rng)[1]})),
+            ("POST /organizations/", "POST", lambda rng: ("/api/organizations/", {
+                "name": "Бенчмарк", "inn": "0", "phones": "8-900-000-00-00",
+                "building_id": rng.choice(data["building_ids"]),
+                "activity_ids": [rng.choice(data["activity_ids"])]})),
+        ]
+    return items
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int,
+                       concurrency: int, seed: int) -> dict:
+    name, method, make = scenario
+    rng = random.Random(seed)
+    calls = [make(rng) for _ in range(requests)]
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(calls)
+
+    async def worker():
+        nonlocal errors
+        for url, body in queue:
+            started = perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "rps": requests / elapsed,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: Dict[str, dict], baseline: Optional[Dict[str, dict]]) -> None:
+    header = f"{'endpoint':<45} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8} {'err':>5}"
+    print(header + ("   Δp95     Δrps" if baseline else ""))
+    for name, stats in results.items():
+        line = (f"{name:<45} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+                f"{stats['p99_ms']:>8.2f} {stats['rps']:>8.0f} {stats['errors']:>5}")
+        base = (baseline or {}).get(name)
+        if base:
+            line += (f" {(stats['p95_ms'] / base['p95_ms'] - 1) * 100:>+6.1f}%"
+                     f" {(stats['rps'] / base['rps'] - 1) * 100:>+7.1f}%")
+        print(line)
+
+
+async def main_async(args) -> dict:
+    async with app.router.lifespan_context(app):
+        data = await sample_data()
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            results = {}
+            for scenario in scenarios(data, args.writes):
+                # Прогрев: соединения пула, подготовленные выражения
+                await run_scenario(client, scenario, min(20, args.requests), 1, args.seed)
+                results[scenario[0]] = await run_scenario(
+                    client, scenario, args.requests, args.concurrency, args.seed)
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {"requests": args.requests, "concurrency": args.concurrency,
+                   "seed": args.seed, "writes": args.writes},
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="запросов на эндпоинт")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--writes", action="store_true", help="включить POST-эндпоинты")
+    parser.add_argument("--out", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_results(report["results"], baseline)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
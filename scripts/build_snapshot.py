@@ -0,0 +1,115 @@
+"""
+Сборка снимка для режима DATA_SOURCE=snapshot из таблиц Postgres.
+
+В снимок попадают здания (id, адрес, координаты), организации со
+связями с активностями (смещения + плоский массив id) и гео-индекс:
+координаты организаций, отсортированные по широте. Файл пишется рядом и
+атомарно подменяет старый; работающие воркеры подхватят новый снимок
+после перезапуска. В заголовке сохраняются change_seq, на котором снят
+снимок, и готовый токен since: GET /api/changes?since=<токен> отдаёт всё,
+что изменилось после снимка.
+
+Запуск: python -m scripts.build_snapshot --out /var/lib/app/snapshot.bin
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Dict
+
+import numpy as np
+from sqlalchemy import select
+
+from app.config import settings
+from app.crud.changes import CHANGE_SOURCES
+from app.crud.organization_crud import stream_organizations
+from app.pagination import encode_cursor
+from app.snapshot import Snapshot, pack_strings, write_snapshot
+from db.models.building import Building
+from db.models.change_feed import change_sequence
+from db.session import AsyncSessionLocal
+
+
+def strings(name: str, values) -> Dict[str, np.ndarray]:
+    return {f"{name}_{part}": array for part, array in pack_strings(values).items()}
+
+
+async def build(path: str, chunk_size: int) -> None:
+    started = perf_counter()
+    async with AsyncSessionLocal() as db:
+        # Одна транзакция REPEATABLE READ: все таблицы из одного момента
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        # Номер последней закоммиченной записи: писатели берут номера под
+        # блокировкой строки счётчика до коммита, поэтому все транзакции с
+        # номером не больше этого уже видны в нашем снимке
+        change_seq = await db.scalar(select(change_sequence.c.value))
+        buildings = (await db.execute(
+            select(Building.id, Building.address, Building.latitude, Building.longitude)
+            .order_by(Building.id))).all()
+        organizations = []
+        async for chunk in stream_organizations(db, chunk_size):
+            organizations += chunk
+
+    building_ids = np.array([row.id for row in buildings], dtype=np.int32)
+    building_latitudes = np.array([row.latitude for row in buildings], dtype=np.float64)
+    building_longitudes = np.array([row.longitude for row in buildings], dtype=np.float64)
+
+    building_rows = np.searchsorted(
+        building_ids, np.array([row.building_id for row in organizations], dtype=np.int32)
+    ).astype(np.int32)
+    link_counts = [len(row.activity_ids) for row in organizations]
+    link_offsets = np.zeros(len(organizations) + 1, dtype=np.int64)
+    np.cumsum(link_counts, out=link_offsets[1:])
+    link_ids = np.fromiter(
+        (activity_id for row in organizations for activity_id in row.activity_ids),
+        dtype=np.int32, count=int(link_offsets[-1]))
+
+    # Гео-индекс: организации по широте, поиск по полосе — searchsorted
+    organization_latitudes = building_latitudes[building_rows]
+    geo_order = np.argsort(organization_latitudes, kind="stable").astype(np.int32)
+
+    arrays = {
+        "building_id": building_ids,
+        "building_latitude": building_latitudes,
+        "building_longitude": building_longitudes,
+        **strings("building_address", [row.address for row in buildings]),
+        "organization_id": np.array([row.id for row in organizations], dtype=np.int32),
+        "organization_building_row": building_rows,
+        **strings("organization_name", [row.name for row in organizations]),
+        **strings("organization_inn", [row.inn for row in organizations]),
+        **strings("organization_phones", [row.phones for row in organizations]),
+        "organization_activity_offsets": link_offsets,
+        "organization_activity_ids": link_ids,
+        "geo_organization_row": geo_order,
+        "geo_latitude": organization_latitudes[geo_order],
+        "geo_longitude": building_longitudes[building_rows][geo_order],
+    }
+    write_snapshot(path, arrays, {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "change_seq": int(change_seq),
+        # Ключ ленты (change_seq, источник, id) сразу за всеми записями change_seq
+        "since": encode_cursor(seq=int(change_seq), source=len(CHANGE_SOURCES), id=0),
+        "buildings": len(buildings),
+        "organizations": len(organizations),
+    })
+
+    snapshot = Snapshot(path)  # проверка, что файл читается
+    size = sum(array.nbytes for array in snapshot.arrays.values())
+    print(f"{path}: {len(buildings)} зданий, {len(organizations)} организаций, "
+          f"{size / 2**20:.1f} MiB, change_seq={change_seq}, "
+          f"{perf_counter() - started:.1f} с\nsince={snapshot.meta['since']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", default=settings.snapshot_path,
+                        help="путь к файлу снимка (по умолчанию SNAPSHOT_PATH)")
+    parser.add_argument("--chunk-size", type=int, default=settings.export_chunk_size)
+    args = parser.parse_args()
+    if not args.out:
+        parser.error("укажите --out или SNAPSHOT_PATH")
+    asyncio.run(build(args.out, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Массовый импорт из JSONL или CSV.
+
+JSONL: по записи на строку, тип задаётся полем type
+(building / activity / organization), см. schemas/bulk.py.
+CSV: один тип на файл (--type), списки в ячейках разделяются «;».
+
+Запуск: python -m scripts.bulk_import data.jsonl
+        python -m scripts.bulk_import organizations.csv --type organization
+"""
+import argparse
+import asyncio
+import csv
+import json
+from typing import Iterator, Optional
+
+from pydantic import TypeAdapter
+
+from app.crud.bulk import BulkImporter
+from db.session import AsyncSessionLocal
+from schemas.bulk import ImportRecord, ImportReport
+
+LIST_FIELDS = ("activity_ids", "activity_refs")
+
+record_adapter = TypeAdapter(ImportRecord)
+
+
+def read_jsonl(path: str) -> Iterator[ImportRecord]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield record_adapter.validate_python(json.loads(line))
+
+
+def read_csv(path: str, record_type: str) -> Iterator[ImportRecord]:
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            data = {key: value for key, value in row.items() if value != ""}
+            for field in LIST_FIELDS:
+                if field in data:
+                    data[field] = [item.strip() for item in data[field].split(";") if item.strip()]
+            data["type"] = record_type
+            yield record_adapter.validate_python(data)
+
+
+def print_progress(report: ImportReport) -> None:
+    print(f"здания: {report.buildings}, активности: {report.activities}, "
+          f"организации: {report.organizations}, "
+          f"{report.rows_per_second:.0f} строк/с")
+
+
+async def run(path: str, record_type: Optional[str], batch_size: int) -> ImportReport:
+    records = read_csv(path, record_type) if record_type else read_jsonl(path)
+    async with AsyncSessionLocal() as session:
+        importer = BulkImporter(session, batch_size, progress=print_progress)
+        await importer.add_many(records)
+        return await importer.finish()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--type", choices=["building", "activity", "organization"],
+                        help="тип записей CSV-файла; без него файл читается как JSONL")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.path, args.type, args.batch_size))
+    print(report.model_dump_json())
+
+
+if __name__ == "__main__":
+    main()
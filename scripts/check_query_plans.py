@@ -0,0 +1,147 @@
+"""
+Проверка планов горячих запросов CRUD.
+
+Каждая функция из app/crud выполняется против заполненной БД (например,
+после scripts.generate_data), выданные ею SQL-запросы перехватываются и
+повторяются с EXPLAIN (FORMAT JSON) с теми же параметрами. Проверка
+падает, если в плане есть Seq Scan по таблице, где строк больше порога
+(--min-rows): значит, запрос перестал попадать в индекс.
+
+Запуск: python -m scripts.check_query_plans --min-rows 10000
+Код возврата 1, если хотя бы одна проверка не прошла.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Awaitable, Callable, Dict, Iterator, List, Tuple
+
+from sqlalchemy import event, select, text
+
+from app.crud.activity import get_activity_by_id, get_all_activities
+from app.crud.building import get_all_buildings, get_building_by_id
+from app.crud.changes import CHANGE_SOURCES, get_changes
+from app.crud.organization import (get_nearest_organizations, get_organization_by_id,
+                                   get_organizations_by_activity,
+                                   get_organizations_by_activity_tree,
+                                   get_organizations_by_building, get_organizations_by_geo,
+                                   get_organizations_by_ids)
+from app.crud.organization_crud import get_organizations_by_phone, search_organizations
+from db.models.activity import Activity
+from db.models.building import Building
+from db.models.organization import Organization
+from db.session import AsyncSessionLocal, engine
+
+Check = Tuple[str, Callable[..., Awaitable]]
+
+
+async def sample(db) -> Dict:
+    """Существующие значения для параметров проверяемых запросов."""
+    building = (await db.execute(
+        select(Building.id, Building.latitude, Building.longitude).limit(1))).one()
+    organization = (await db.execute(
+        select(Organization.id, Organization.name, Organization.phones_e164)
+        .where(Organization.phones_e164 != []).limit(1))).one()
+    # Вложенная активность: поддерево корня может покрывать заметную долю
+    # организаций, и тогда Seq Scan — честный выбор планировщика
+    activity = (await db.execute(
+        select(Activity.id, Activity.name).where(Activity.parent_id.is_not(None))
+        .order_by(Activity.id).limit(1))).one()
+    return {"building": building, "organization": organization, "activity": activity}
+
+
+def checks(data: Dict) -> List[Check]:
+    building, organization, activity = data["building"], data["organization"], data["activity"]
+    return [
+        ("get_building_by_id", lambda db: get_building_by_id(db, building.id)),
+        ("get_all_buildings (page)",
+         lambda db: get_all_buildings(db, limit=100, after_id=building.id)),
+        ("get_activity_by_id", lambda db: get_activity_by_id(db, activity.id)),
+        ("get_all_activities (page)", lambda db: get_all_activities(db, limit=100)),
+        ("get_organization_by_id", lambda db: get_organization_by_id(db, organization.id)),
+        ("get_organizations_by_ids",
+         lambda db: get_organizations_by_ids(db, [organization.id, organization.id + 1])),
+        ("get_organizations_by_building",
+         lambda db: get_organizations_by_building(db, building.id, limit=100)),
+        ("get_organizations_by_activity",
+         lambda db: get_organizations_by_activity(db, activity.name, limit=100)),
+        ("get_organizations_by_activity_tree",
+         lambda db: get_organizations_by_activity_tree(db, activity.name, limit=100)),
+        ("get_organizations_by_geo (radius)",
+         lambda db: get_organizations_by_geo(db, building.latitude, building.longitude, 1.0)),
+        ("get_nearest_organizations",
+         lambda db: get_nearest_organizations(db, building.latitude, building.longitude, 20)),
+        ("get_organizations_by_phone",
+         lambda db: get_organizations_by_phone(db, organization.phones_e164[0], limit=100)),
+        ("search_organizations (name)",
+         lambda db: search_organizations(db, name=organization.name[:6], limit=100)),
+        # Дельта после первоначальной выгрузки (change_seq = 1 у всех строк)
+        ("get_changes (delta)",
+         lambda db: get_changes(db, (1, len(CHANGE_SOURCES), 0), limit=100)),
+    ]
+
+
+def seq_scans(plan: dict) -> Iterator[str]:
+    """Таблицы, которые план читает последовательным сканированием."""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", ()):
+        yield from seq_scans(child)
+
+
+async def table_sizes(db) -> Dict[str, float]:
+    result = await db.execute(text(
+        "SELECT relname, reltuples FROM pg_class "
+        "WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"))
+    return dict(result.all())
+
+
+async def run(min_rows: int) -> int:
+    captured: List[Tuple[str, object]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    failures = 0
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("ANALYZE"))
+        sizes = await table_sizes(db)
+        data = await sample(db)
+
+        for name, call in checks(data):
+            captured.clear()
+            event.listen(engine.sync_engine, "before_cursor_execute", capture)
+            try:
+                await call(db)
+            finally:
+                event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+            problems = []
+            for statement, parameters in list(captured):
+                result = await db.connection()
+                explain = await result.exec_driver_sql(
+                    "EXPLAIN (FORMAT JSON) " + statement, parameters)
+                plan = explain.scalar()
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                problems += [table for table in seq_scans(plan[0]["Plan"])
+                             if sizes.get(table, 0) > min_rows]
+
+            status = "FAIL" if problems else "ok"
+            detail = f" (Seq Scan: {', '.join(sorted(set(problems)))})" if problems else ""
+            print(f"{status:<4} {name}: {len(captured)} запрос(ов){detail}")
+            failures += bool(problems)
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--min-rows", type=int, default=10_000,
+                        help="Seq Scan по таблицам меньше этого размера допустим")
+    args = parser.parse_args()
+    failures = asyncio.run(run(args.min_rows))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Генератор синтетических данных для нагрузочных тестов.
+
+Здания группируются вокруг нескольких «городов» (нормальное распределение
+координат), дерево активностей — 3 уровня, у каждой организации 1–3
+активности. Генерация детерминирована (--seed). Записи либо пишутся в
+JSONL для scripts.bulk_import (--out), либо сразу загружаются в БД.
+
+Запуск: python -m scripts.generate_data --buildings 10000 --organizations 100000
+"""
+import argparse
+import asyncio
+import json
+import random
+from typing import Iterator
+
+from app.crud.bulk import BulkImporter
+from db.session import AsyncSessionLocal
+from scripts.bulk_import import print_progress, record_adapter
+
+# (широта, долгота, разброс в градусах)
+CITIES = (
+    (55.7558, 37.6176, 0.15),   # Москва
+    (59.9343, 30.3351, 0.10),   # Санкт-Петербург
+    (55.0084, 82.9357, 0.08),   # Новосибирск
+    (56.8389, 60.6057, 0.07),   # Екатеринбург
+    (55.7961, 49.1064, 0.06),   # Казань
+)
+# Доля зданий по городам: крупные города плотнее
+CITY_WEIGHTS = (0.45, 0.25, 0.12, 0.10, 0.08)
+STREETS = ("Ленина", "Мира", "Гагарина", "Советская", "Садовая", "Лесная", "Пушкина")
+ROOTS, CHILDREN, GRANDCHILDREN = 8, 4, 3
+
+
+def activity_refs() -> list:
+    """Ссылки на все активности дерева ROOTS x CHILDREN x GRANDCHILDREN."""
+    refs = []
+    for i in range(ROOTS):
+        refs.append(f"a{i}")
+        for j in range(CHILDREN):
+            refs.append(f"a{i}.{j}")
+            refs.extend(f"a{i}.{j}.{k}" for k in range(GRANDCHILDREN))
+    return refs
+
+
+def generate(buildings: int, organizations: int, seed: int) -> Iterator[dict]:
+    rng = random.Random(seed)
+
+    for i in range(buildings):
+        lat, lon, spread = rng.choices(CITIES, CITY_WEIGHTS)[0]
+        yield {
+            "type": "building",
+            "ref": f"b{i}",
+            "address": f"ул. {rng.choice(STREETS)}, {rng.randint(1, 200)}",
+            "latitude": rng.gauss(lat, spread),
+            "longitude": rng.gauss(lon, spread * 1.7),
+        }
+
+    for ref in activity_refs():
+        parent_ref = ref.rsplit(".", 1)[0] if "." in ref else None
+        yield {
+            "type": "activity",
+            "ref": ref,
+            "name": f"Деятельность {ref[1:]}",
+            "parent_ref": parent_ref,
+        }
+
+    activities = activity_refs()
+    for i in range(organizations):
+        # Квадрат равномерной величины: часть зданий заметно популярнее
+        building = int(rng.random() ** 2 * buildings)
+        yield {
+            "type": "organization",
+            "name": f"Организация {i}",
+            "inn": f"{rng.randrange(10 ** 9, 10 ** 10)}",
+            "phones": ", ".join(
+                f"8-9{rng.randint(10, 99)}-{rng.randint(100, 999)}-{rng.randint(10, 99)}-"
+                f"{rng.randint(10, 99)}" for _ in range(rng.randint(1, 3))),
+            "building_ref": f"b{building}",
+            "activity_refs": rng.sample(activities, rng.randint(1, 3)),
+        }
+
+
+async def load(records: Iterator[dict], batch_size: int) -> None:
+    async with AsyncSessionLocal() as session:
+        importer = BulkImporter(session, batch_size, progress=print_progress)
+        await importer.add_many(record_adapter.validate_python(record) for record in records)
+        report = await importer.finish()
+    print(report.model_dump_json())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--buildings", type=int, default=10_000)
+    parser.add_argument("--organizations", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--out", help="записать JSONL вместо загрузки в БД")
+    args = parser.parse_args()
+
+    records = generate(args.buildings, args.organizations, args.seed)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    else:
+        asyncio.run(load(records, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()